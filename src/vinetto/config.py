@@ -53,11 +53,13 @@ THUMBS_TYPE_OLE_PIL = None  # No attempt to load PIL
 THUMBS_TYPE_OLE_PIL_TYPE1_HEADER   = None
 THUMBS_TYPE_OLE_PIL_TYPE1_QUANTIZE = None
 THUMBS_TYPE_OLE_PIL_TYPE1_HUFFMAN  = None
+THUMBS_TYPE_OLE_PIL_TYPE1_PREFIX   = None  # Generic JPEG Header + Quantization Table
 
 THUMBS_SIG_OLE =  bytearray(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1")  # Standard Sig for OLE2 Thumbs.db file
 THUMBS_SIG_OLEB = bytearray(b"\x0e\x11\xfc\x0d\xd0\xcf\x11\xe0")  # Older Beta Sig for OLE2 Thumbs.db file
 THUMBS_SIG_CMMM = bytearray(b"CMMM")  # Standard Sig for Thumbcache_*.db files
 THUMBS_SIG_IMMM = bytearray(b"IMMM")  # Standard Sig for Thumbcache_*.db Index files
+THUMBS_SIG_IMMMP = bytearray(b"\x0c\x000 ") + THUMBS_SIG_IMMM  # Prefixed Sig for Thumbcache_*.db Index files
 
 THUMBS_FILE_TYPES = ["OLE (Thumb.db)", "CMMM (Thumbcache_*.db)", "IMMM (Thumbcache_*.db)"]
 
@@ -139,6 +141,7 @@ TC_FORMAT_TYPE = { "Windows Vista" : 0x14,
                    "Windows 8.1"   : 0x1F,
                    "Windows 10"    : 0x20,
                  }
+TC_FORMAT_TYPE_INV = { iValue : strKey for strKey, iValue in TC_FORMAT_TYPE.items() }  # Format type to name
 TC_FORMAT_TO_CACHE = { 0x14 : 0,  # Keys relate to TC_FORMAT_TYPE
                        0x15 : 0,  # Values relate to index of TC_CACHE_TYPE
                        0x1A : 1,  #
@@ -177,4 +180,7 @@ STR_SEP = " ------------------------------------------------------"
 
 HTTP_REPORT = None
 
+LIST_SYMLINKS = []  # Buffered symlink log lines for the current Thumbnail file
+FILE_SYMLINKS = None  # Symlink log opened once for the run (a parallel job's lines are returned in a StringIO)
+
 ARGS = None
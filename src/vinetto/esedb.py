@@ -33,14 +33,118 @@ file_micro = "8"
 
 
 import sys
-from struct import unpack
-from binascii import hexlify, unhexlify
+from struct import Struct
 
 import vinetto.config as config
 import vinetto.utils as utils
 import vinetto.error as verror
 
 
+###############################################################################
+# Vinetto ESEDB Record Value Decoders
+###############################################################################
+# Date (Win32 FILETIME) Structure...
+ESEDB_DATE = Struct("<Q")
+
+# Boolean Flags integer widths by byte count of the value's bits...
+#   Masks convert a negative 8, 16, 32, or 64 bit integer to positive (indexed by the
+#   bit length of its one's complement // 8) and formats display 8, 16, 32, or 64 flags
+#   (indexed by (bit length - 1) // 8)
+ESEDB_FLAG_MASKS = (0xff, 0xffff, 0xffffffff, 0xffffffff, 0xffffffffffffffff)
+ESEDB_FLAG_FORMATS = ("08b", "016b", "032b", "032b", "064b", "064b", "064b", "064b")
+
+
+def decodeBinary(recordESEDB, iCol):
+    return recordESEDB.get_value_data(iCol)
+
+
+def decodeString(recordESEDB, iCol):
+    return recordESEDB.get_value_data_as_string(iCol)
+
+
+def decodeInteger(recordESEDB, iCol):
+    return recordESEDB.get_value_data_as_integer(iCol)
+
+
+def decodeBoolean(recordESEDB, iCol):
+    rawESEDB = recordESEDB.get_value_data_as_integer(iCol)
+    if (rawESEDB == None or rawESEDB == 0):  # ...convert integer to boolean False
+        rawESEDB = False
+    elif (rawESEDB == 1 or rawESEDB == -1):  # ...convert integer to boolean True
+        rawESEDB = True
+    elif (rawESEDB < 0):  # Setup Flag Display for negative integer flags
+        rawESEDB = rawESEDB & ESEDB_FLAG_MASKS[min((~rawESEDB).bit_length() >> 3, 4)]
+    return rawESEDB
+
+
+def decodeFloat(recordESEDB, iCol):
+    return recordESEDB.get_value_data_as_floating_point(iCol)
+
+
+def decodeDate(recordESEDB, iCol):
+    rawESEDB = recordESEDB.get_value_data(iCol)
+    if (rawESEDB == None):
+        return 0
+    return ESEDB_DATE.unpack(rawESEDB)[0]
+
+
+# Format the key's value for output by the key's type...
+# 'x' - bstr  == (Large) Binary Data
+# 's' - str   == (Large) Text
+# 'i' - int   == Integer (32/16/8)-bit (un)signed
+# 'b' - bool  == Boolean or Boolean Flags (Integer)
+# 'f' - float == Floating Point (Double Precision) (64/32-bit)
+# 'd' - date  == Binary Data converted to Formatted UTC Time
+ESEDB_DECODERS = {
+    'x': decodeBinary,
+    's': decodeString,
+    'i': decodeInteger,
+    'b': decodeBoolean,
+    'f': decodeFloat,
+    'd': decodeDate,
+}
+
+
+def formatBinary(dataESEDB):
+    if (dataESEDB == None):
+        return None
+    return dataESEDB.hex()
+
+
+def formatString(dataESEDB):
+    return dataESEDB
+
+
+def formatInteger(dataESEDB):
+    return format(dataESEDB, "d")
+
+
+def formatBoolean(dataESEDB):
+    if (isinstance(dataESEDB, bool)):
+        return format(dataESEDB, "")
+    # ..Integer
+    return format(dataESEDB, ESEDB_FLAG_FORMATS[min(max(dataESEDB.bit_length() - 1, 0) >> 3, 7)])
+
+
+def formatFloat(dataESEDB):
+    return format(dataESEDB, "G")
+
+
+def formatDate(dataESEDB):
+    return utils.getFormattedWinToPyTimeUTC(dataESEDB)
+
+
+# Format the key's value for output by the key's type (see ESEDB_DECODERS)...
+ESEDB_FORMATTERS = {
+    'x': formatBinary,
+    's': formatString,
+    'i': formatInteger,
+    'b': formatBoolean,
+    'f': formatFloat,
+    'd': formatDate,
+}
+
+
 ###############################################################################
 # Vinetto ESEDB Class
 ###############################################################################
@@ -58,6 +162,8 @@ class ESEDB():
         self.edbFile     = False  # Opened Windows.edb or equivalent user specified file, see config.ARGS.edbfile
         self.table       = None   # Opened SystemIndex_0A or SystemIndex_PropertyStore table from edbFile
         self.listRecords = None   # Image records from table
+        self.listRecordStrs = None  # Image records' formatted values, formatted once for the ESEDB Explorer
+        self.dictRecords = None   # Image records from listRecords indexed by ThumbnailCacheId (first record kept)
         self.dictRecord  = None   # Image record found in listRecords
 
         self.iColNames = {
@@ -220,55 +326,17 @@ class ESEDB():
 
 
     def processRecord(self, recordESEDB, strKey):
-        rawESEDB = None
         iCol = self.iCol[strKey]
         if (iCol == None):
-            return rawESEDB
-
-        cTest = self.iColNames[strKey][1]
-        # Format the key's value for output...
-        # 'x' - bstr  == (Large) Binary Data
-        # 's' - str   == (Large) Text
-        # 'i' - int   == Integer (32/16/8)-bit (un)signed
-        # 'b' - bool  == Boolean or Boolean Flags (Integer)
-        # 'f' - float == Floating Point (Double Precision) (64/32-bit)
-        # 'd' - date  == Binary Data converted to Formatted UTC Time
-        if   (cTest == 'x'):
-            rawESEDB = recordESEDB.get_value_data(iCol)
-        elif (cTest == 's'):
-            rawESEDB = recordESEDB.get_value_data_as_string(iCol)
-        elif (cTest == 'i'):
-            rawESEDB = recordESEDB.get_value_data_as_integer(iCol)
-        elif (cTest == 'b'):
-            rawESEDB = recordESEDB.get_value_data_as_integer(iCol)
-            if (rawESEDB == None or rawESEDB == 0):  # ...convert integer to boolean False
-                rawESEDB = False
-            elif (rawESEDB == 1 or rawESEDB == -1):  # ...convert integer to boolean True
-                rawESEDB = True
-            else:  # Setup Flag Display for integer flags
-                if (rawESEDB < -2147483648):     # ...convert negative 64 bit integer to positive
-                    rawESEDB = rawESEDB & 0xffffffffffffffff
-                if (rawESEDB < -32768):          # ...convert negative 32 bit integer to positive
-                    rawESEDB = rawESEDB & 0xffffffff
-                if (rawESEDB < -128):            # ...convert negative 16 bit integer to positive
-                    rawESEDB = rawESEDB & 0xffff
-                if (rawESEDB < 0):               # ...convert negative 8 bit integer to positive
-                    rawESEDB = rawESEDB & 0xff
-        elif (cTest == 'f'):
-            rawESEDB = recordESEDB.get_value_data_as_floating_point(iCol)
-        elif (cTest == 'd'):
-            rawESEDB = recordESEDB.get_value_data(iCol)
-            if (rawESEDB == None):
-                rawESEDB = 0
-            else:
-                rawESEDB = unpack("<Q", rawESEDB)[0]
-        return rawESEDB
+            return None
+
+        return ESEDB_DECODERS[self.iColNames[strKey][1]](recordESEDB, iCol)
 
 
     def load(self):
         if (self.iCol["TCID"] == None):
             if (config.ARGS.verbose >= 0):
-                sys.stderr.write(" Warning: No ESEDB Image column %s available\n" % utils.ESEDB_ICOL_NAMES["TCID"][0])
+                sys.stderr.write(" Warning: No ESEDB Image column %s available\n" % self.iColNames["TCID"][0])
             self.table = None
             self.edbFile.close()
             self.edbFile = False
@@ -276,15 +344,17 @@ class ESEDB():
         if (self.iCol["MIME"] == None and self.iCol["CTYPE"] == None and self.iCol["ITT"] == None):
             if (config.ARGS.verbose >= 0):
                 sys.stderr.write(" Warning: No ESEDB Image columns %s available\n" %
-                                (utils.ESEDB_ICOL_NAMES["MIME"][0] + ", " +
-                                utils.ESEDB_ICOL_NAMES["CTYPE"][0] + ", or " +
-                                utils.ESEDB_ICOL_NAMES["ITT"][0]))
+                                (self.iColNames["MIME"][0] + ", " +
+                                self.iColNames["CTYPE"][0] + ", or " +
+                                self.iColNames["ITT"][0]))
             self.table = None
             self.edbFile.close()
             self.edbFile = False
             return self.edbFile
 
         self.listRecords = []
+        self.dictRecords = {}
+        self.listRecordStrs = None
 
         if (config.ARGS.verbose > 1):
             sys.stderr.write(" Info:     ESEDB Getting record count...\n")
@@ -298,6 +368,16 @@ class ESEDB():
         iRecAdded = 0
         strRecOut = " Info:         Record #: %d Added: %d\r"
 
+        # Set the remaining columns' decoders once...
+        #   Each key's column and type are fixed for the whole table, so keys without a
+        #   column are only set to None by the record's initial keys
+        tupleRecordKeys = ("TCID", "MIME", "CTYPE", "ITT")
+        tupleRecordKeys += tuple(strKey for strKey in self.iColNames if (strKey not in tupleRecordKeys))
+        tupleDecoders = tuple(
+            (strKey, self.iCol[strKey], ESEDB_DECODERS[self.iColNames[strKey][1]])
+            for strKey in tupleRecordKeys[4:]
+            if (self.iCol[strKey] != None) )
+
         # Read all the records...
         for iRec in range(iRecCnt):
             record = self.table.get_record(iRec)
@@ -327,7 +407,7 @@ class ESEDB():
                 continue
 
     #        # TEST Record Retrieval...
-    #        print("\nTCID: " + str( hexlify( bstrRecTCID ))[2:-1])
+    #        print("\nTCID: " + bstrRecTCID.hex())
     #        for strKey in self.iColNames:
     #            if (strKey == "TCID"):
     #                continue
@@ -335,18 +415,17 @@ class ESEDB():
     #            rawESEDB = self.processRecord(record, strKey)
     #            print(rawESEDB)
 
-            dictRecord = {}
+            dictRecord = dict.fromkeys(tupleRecordKeys)
             dictRecord["TCID"]  = bstrRecTCID
             dictRecord["MIME"]  = strMime
             dictRecord["CTYPE"] = strCType
             dictRecord["ITT"]   = strITT
 
-            for strKey in self.iColNames:
-                if (strKey == "TCID" or strKey == "MIME" or strKey == "CTYPE" or strKey == "ITT"):
-                    continue
-                dictRecord[strKey] = self.processRecord(record, strKey)
+            for (strKey, iCol, funcDecode) in tupleDecoders:
+                dictRecord[strKey] = funcDecode(record, iCol)
 
             self.listRecords.append(dictRecord)
+            self.dictRecords.setdefault(bstrRecTCID, dictRecord)
             iRecAdded += 1
             if (config.ARGS.verbose > 1):
                 sys.stderr.write(strRecOut % (iRec + 1, iRecAdded))
@@ -363,6 +442,7 @@ class ESEDB():
 
         if (len(self.listRecords) == 0):
             self.listRecords = None
+            self.dictRecords = None
             if (config.ARGS.verbose >= 0):
                 sys.stderr.write(" Warning: No ESEDB Image data available\n")
             self.table = None
@@ -383,62 +463,53 @@ class ESEDB():
         strESEDB = None
         if (self.dictRecord == None):
             return strESEDB
-        dataESEDB = None
         iCol = self.iCol[strKey]
         if (iCol != None):
-            cTest = self.iColNames[strKey][1]
-            # Format the key's value for output...
-            # 'x' - bstr  == (Large) Binary Data
-            # 's' - str   == (Large) Text
-            # 'i' - int   == Integer (32/16/8)-bit (un)signed
-            # 'b' - bool  == Boolean or Boolean Flags (Integer)
-            # 'f' - float == Floating Point (Double Precision) (64/32-bit)
-            # 'd' - date  == Binary Data converted to Formatted UTC Time
-
-            if   (cTest == 'x'):
-                strESEDB = str( hexlify( self.dictRecord[strKey] ))[2:-1]  # ...stript off start b' and end '
-            elif (cTest == 's'):
-                strESEDB = self.dictRecord[strKey]
-            elif (cTest == 'i'):
-                strESEDB = format(self.dictRecord[strKey], "d")
-            elif (cTest == 'b'):
-                if (isinstance(self.dictRecord[strKey], bool)):
-                    strESEDB = format(self.dictRecord[strKey], "")
-                else:  # ..Integer
-                    strFmt = "08b"               # ...setup flag format for 8 bit integer
-                    if (self.dictRecord[strKey] > 255):
-                        strFmt = "016b"          # ...setup flag format for 16 bit integer format
-                    if (self.dictRecord[strKey] > 65535):
-                        strFmt = "032b"          # ...setup flag format for 32 bit integer format
-                    if (self.dictRecord[strKey] > 4294967295):
-                        strFmt = "064b"          # ...setup flag format for 64 bit integer format
-                    strESEDB = format(self.dictRecord[strKey], strFmt)
-            elif (cTest == 'f'):
-                strESEDB = format(self.dictRecord[strKey], "G")
-            elif (cTest == 'd'):
-                strESEDB = utils.getFormattedWinToPyTimeUTC(self.dictRecord[strKey])
+            # Format the key's value for output by the key's type...
+            strESEDB = ESEDB_FORMATTERS[self.iColNames[strKey][1]](self.dictRecord[strKey])
         return strESEDB
 
 
-    def printInfo(self, bHead = True):
+    def getRecordStrs(self):
+        # Return all the records' formatted values (see getStr), formatted on first use...
+        if (self.listRecordStrs == None):
+            tupleFormatters = tuple(
+                (strKey, ESEDB_FORMATTERS[self.iColNames[strKey][1]])
+                for strKey in self.iColNames
+                if (self.iCol[strKey] != None) )
+            self.listRecordStrs = [
+                { strKey : (None if (dictRecord[strKey] == None) else funcFormat(dictRecord[strKey]))
+                  for (strKey, funcFormat) in tupleFormatters }
+                for dictRecord in self.listRecords ]
+        return self.listRecordStrs
+
+
+    def printInfo(self, bHead = True, dictRecordStrs = None):
+        # Print the found record or, if given, a record's formatted values...
         strEnhance = " ESEDB Enhance:"
+        getStr = self.getStr
+        if (dictRecordStrs != None):
+            getStr = dictRecordStrs.get
         # If there is no output...
-        if (self.dictRecord == None):
+        elif (self.dictRecord == None):
             if bHead:
                 print(strEnhance + " None")
             return
 
-        # Otherwise, print...
+        # Otherwise, print as one write...
+        listLines = []
         if bHead:
-            print(strEnhance)
+            listLines.append(strEnhance)
         if (config.ARGS.verbose > 0):
             for strKey in self.iColNames:
-                strESEDB = self.getStr(strKey)
+                strESEDB = getStr(strKey)
                 if (strESEDB != None):
-                    print("%s%s" % (self.iColNames[strKey][2], strESEDB))
+                    listLines.append("%s%s" % (self.iColNames[strKey][2], strESEDB))
         else:
-            strESEDB = self.getStr("TCID")
-            print("%s%s" % (self.iColNames["TCID"][2], strESEDB))
+            strESEDB = getStr("TCID")
+            listLines.append("%s%s" % (self.iColNames["TCID"][2], strESEDB))
+        listLines.append("")
+        sys.stdout.write("\n".join(listLines))
         return
 
     def examineRecord(self, strCmd):
@@ -456,9 +527,9 @@ class ESEDB():
             try:
                 iRec = int(strCmd[2:])
                 try:
-                    dictRecord = self.listRecords[iRec - 1]
+                    dictRecordStrs = self.getRecordStrs()[iRec - 1]
                     print("Record: %d" % iRec)
-                    self.printInfo(False)
+                    self.printInfo(False, dictRecordStrs)
                     print()
                 except:
                     print(strValidRecord)
@@ -519,10 +590,10 @@ class ESEDB():
             elif (strCmd == "l"):  # List
                 print("List")
                 iCount = 0
-                for dictRecord in self.listRecords:
+                for dictRecordStrs in self.getRecordStrs():
                     iCount += 1
                     print("Record: %d" % iCount)
-                    self.printInfo(False)
+                    self.printInfo(False, dictRecordStrs)
                     print()
                 print(strRecordsFound % iCount)
 
@@ -585,21 +656,21 @@ class ESEDB():
                             reObj = re.compile(strRegEx)
                             isFound = lambda v : reObj.search(v) if (v != None) else False
                             iRec = 0
-                            for dictRecord in self.listRecords:
+                            for dictRecordStrs in self.getRecordStrs():
                                 iRec += 1
                                 bFound = False
                                 if (strColKey == None):
-                                    for strKey in dictRecord:
-                                        if isFound(self.getStr(strKey)):
+                                    for strESEDB in dictRecordStrs.values():
+                                        if isFound(strESEDB):
                                             bFound = True
                                             break
-                                elif isFound(self.getStr(strColKey)):
+                                elif isFound(dictRecordStrs.get(strColKey)):
                                     bFound = True
 
                                 if (bFound):
                                     iCount += 1
                                     print("Record: %d" % iRec)
-                                    self.printInfo(False)
+                                    self.printInfo(False, dictRecordStrs)
                                     print()
                         print(strRecordsFound % iCount)
 
@@ -622,25 +693,21 @@ class ESEDB():
 
     def search(self, strTCID):
         self.dictRecord = None
-        if (self.listRecords == None or strTCID == None):
+        if (self.dictRecords == None or strTCID == None):
             return False
 
         strConvertTCID = strTCID
         if (len(strTCID)%2 == 1):
             strConvertTCID = "0" + strTCID
         try:
-            bstrTCID = unhexlify(strConvertTCID)
+            bstrTCID = bytes.fromhex(strConvertTCID)
         except:
             if (config.ARGS.verbose >= 0):
                 sys.stderr.write(" Warning: Cannot unhex given Thumbnail Cache ID (%s) for compare\n" % strConvertTCID)
             return False
 
-        for dictRecord in self.listRecords:
-    #        # TEST TCID Compare...
-    #        print(str(hexlify(bstrTCID))[2:-1] + " <> " + str(hexlify(dictRecord["BTCID"]))[2:-1])
-            if (bstrTCID == dictRecord["TCID"]):
-                self.dictRecord = dictRecord
-                break
+        # Find the record by its ThumbnailCacheId in the index...
+        self.dictRecord = self.dictRecords.get(bstrTCID)
 
         if (self.dictRecord == None):
             return False
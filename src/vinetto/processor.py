@@ -35,8 +35,15 @@ file_micro = "10"
 import sys
 import os
 import fnmatch
+import re
+import mmap
+from io import StringIO
+from hashlib import md5
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor
 
 import vinetto.config as config
+import vinetto.esedb as esedb
 import vinetto.report as report
 import vinetto.thumbOLE as thumbOLE
 import vinetto.thumbCMMM as thumbCMMM
@@ -45,13 +52,98 @@ import vinetto.utils as utils
 import vinetto.error as verror
 
 
+# Thumbnail cache file name patterns to process in a directory...
+#   Thumbs.db, ehthumbs.db, ehthumbs_vista.db, Image.db, Video.db, TVThumb.db, and musicThumbs.db
+#
+#   thumbcache_*.db (2560, 1920, 1600, 1280, 1024, 768, 256, 96, 48, 32, 16, sr, wide, exif, wide_alternate, custom_stream)
+#   iconcache_*.db
+#INCLUDES = ['*humbs.db', '*humbs_*.db', 'Image.db', 'Video.db', 'TVThumb.db', 'thumbcache_*.db', 'iconcache_*.db']
+INCLUDES = ['*.db']
+
+# The patterns split by shape, prepared once...
+#   Matches like fnmatch.filter(), including its case folding where the OS paths are case insensitive
+#     Names:  plain names (no wildcards) are tested by set membership
+#     Simple: "prefix*suffix" patterns are tested with startswith() and endswith()
+#     RE:     any other patterns are joined into one regular expression
+INCLUDES_FOLD = (os.path.normcase("A") == "a")
+
+
+def getIncludes(listPatterns):
+    # Split the patterns by shape, returning the (Names, Simple, RE) matches...
+    setNames = set()
+    listSimple = []
+    listRE = []
+    for strPattern in listPatterns:
+        if (INCLUDES_FOLD):
+            strPattern = strPattern.lower()
+        matchShape = re.match(r"([^*?\[]*)(\*?)([^*?\[]*)\Z", strPattern)
+        if (matchShape == None):
+            listRE.append("(?:" + fnmatch.translate(strPattern) + ")")
+        elif (matchShape.group(2) == ""):
+            setNames.add(strPattern)
+        else:
+            listSimple.append((matchShape.group(1), matchShape.group(3)))
+    return (setNames, tuple(listSimple), (re.compile("|".join(listRE)) if (listRE) else None))
+
+
+(INCLUDES_NAMES, INCLUDES_SIMPLE, INCLUDES_RE) = getIncludes(INCLUDES)
+
+
+def isIncluded(filename):
+    # Is the file name matched by an INCLUDES pattern?
+    if (INCLUDES_FOLD):
+        filename = filename.lower()
+    if (filename in INCLUDES_NAMES):
+        return True
+    for (strPrefix, strSuffix) in INCLUDES_SIMPLE:
+        if (len(filename) >= len(strPrefix) + len(strSuffix) and
+            filename.startswith(strPrefix) and filename.endswith(strSuffix)):
+            return True
+    return (INCLUDES_RE != None and INCLUDES_RE.match(filename) != None)
+
+
+###############################################################################
+# Vinetto Processor Pool Workers
+###############################################################################
+def initWorker(args):
+    # Initialize a pool worker process with the main process's settings...
+    #   Only the arguments are passed, so the worker does not depend on the process start
+    #   method.  The given ESEDB file is loaded again in the worker.  The main process has
+    #   already reported its warnings, so the worker's load output is discarded.
+    config.ARGS = args
+    if (config.ARGS.edbfile != None):
+        config.ESEDB = esedb.ESEDB()
+        with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+            try:
+                if (config.ESEDB.prepare()):  # ...open...
+                    config.ESEDB.load()       # ...read, close...
+            except verror.VinettoError:
+                pass  # ...not loaded, searches find nothing
+
+
+def processThumbFileWorker(thumbFile, filenames):
+    # Process a Thumbnail file in a pool worker process...
+    #   The worker's output and symlink log lines are captured and returned with any raised
+    #   error so the main process can report each file's output and log its symlinks in order
+    strioOut = StringIO()
+    strioErr = StringIO()
+    config.FILE_SYMLINKS = StringIO()  # ...the file's symlink log lines (see utils.writeSymlinkLog)
+    errorRaised = None
+    with redirect_stdout(strioOut), redirect_stderr(strioErr):
+        try:
+            Processor().processThumbFile(thumbFile, filenames)
+        except Exception as e:
+            errorRaised = e
+    return (strioOut.getvalue(), strioErr.getvalue(), config.FILE_SYMLINKS.getvalue(), errorRaised)
+
+
 ###############################################################################
 # Vinetto Processor Class
 ###############################################################################
 class Processor():
     def __init__(self):
         # Initialize a new Processor instance...
-        pass
+        self.executor = None  # ...pool shared by the directories of a walk (see processRecursiveDirectory)
 
     def processThumbFile(self, infile, filenames = None):
         # Open given Thumbnail file...
@@ -69,13 +161,18 @@ class Processor():
         dictHead = {}
         dictHead["FilePath"] = infile
         dictHead["FileSize"] = None
+        dictHead["ModifyTime"] = None
         dictHead["MD5"] = None
         dictHead["FileType"] = None
 
-        # Get file size of file...
+        # Get file size and modify time of file...
+        #   Use the opened file's status so the path is not looked up again
         try:
-            dictHead["FileSize"] = os.stat(infile).st_size
+            statThumbsDB = os.fstat(fileThumbsDB.fileno())
+            dictHead["FileSize"] = statThumbsDB.st_size
+            dictHead["ModifyTime"] = statThumbsDB.st_mtime
         except:
+            fileThumbsDB.close()
             strMsg = "Cannot get size of file " + infile
             if (config.ARGS.mode == "f"):  # ...only processing a single file, error
                 raise verror.ProcessError(" Error (Process): " + strMsg)
@@ -83,11 +180,41 @@ class Processor():
                 sys.stderr.write(" Warning: " + strMsg + "\n")
             return
 
+        # Map file into memory for the parsers...
+        #   The parsers slice and unpack directly from the mapped file, so no seek / read copies
+        #   are needed.  An empty file cannot be mapped, so fall back to its (empty) contents.
+        try:
+            mapThumbsDB = mmap.mmap(fileThumbsDB.fileno(), 0, access=mmap.ACCESS_READ)
+            # Ask the kernel to start reading the whole file in the background while the
+            #   headers are parsed (madvise() is available from Python 3.8 on some platforms)...
+            if hasattr(mmap, "MADV_WILLNEED"):
+                mapThumbsDB.madvise(mmap.MADV_WILLNEED)
+        except (ValueError, OSError):
+            mapThumbsDB = fileThumbsDB.read()
+        fileThumbsDB.close()
+
+        # Process the mapped file, then close the mapping...
+        #   The parsers release their views of the mapping when done, even on an error, so
+        #   the mapping is always closed here.  A view still held is a bug (BufferError).
+        try:
+            self.processThumbMap(dictHead, mapThumbsDB)
+        finally:
+            if (isinstance(mapThumbsDB, mmap.mmap)):
+                mapThumbsDB.close()
+
+        return
+
+
+    def processThumbMap(self, dictHead, mapThumbsDB):
+        # Process the Thumbnail file's mapped (or read) contents...
         # Get MD5 of file...
+        #   Hash the mapped file in 1 MiB chunks so large files are not copied into memory
         if (config.ARGS.md5force) or ((not config.ARGS.md5never) and (dictHead["FileSize"] < (1024 ** 2) * 512)):
-            from hashlib import md5
-            dictHead["MD5"] = md5( fileThumbsDB.read() ).hexdigest()
-            del md5
+            hashMD5 = md5()
+            with memoryview(mapThumbsDB) as mvThumbsDB:
+                for iOffset in range(0, len(mvThumbsDB), 1024 ** 2):
+                    hashMD5.update(mvThumbsDB[iOffset:iOffset + 1024 ** 2])
+            dictHead["MD5"] = hashMD5.hexdigest()
 
         # -----------------------------------------------------------------------------
         # Begin analysis output...
@@ -103,17 +230,16 @@ class Processor():
         # Analyzing header block...
 
         iInitialOffset = 0
-        fileThumbsDB.seek(0)
-        bstrSig = fileThumbsDB.read(8)
-        if   (bstrSig[0:8] == config.THUMBS_SIG_OLE):
+        bstrSig = mapThumbsDB[0:8]
+        if   (bstrSig == config.THUMBS_SIG_OLE):
             dictHead["FileType"] = config.THUMBS_TYPE_OLE
-        elif (bstrSig[0:8] == config.THUMBS_SIG_OLEB):
+        elif (bstrSig == config.THUMBS_SIG_OLEB):
             dictHead["FileType"] = config.THUMBS_TYPE_OLE
         elif (bstrSig[0:4] == config.THUMBS_SIG_CMMM):
             dictHead["FileType"] = config.THUMBS_TYPE_CMMM
         elif (bstrSig[0:4] == config.THUMBS_SIG_IMMM):
             dictHead["FileType"] = config.THUMBS_TYPE_IMMM
-        elif (bstrSig[0:8] == bytearray(b"\x0c\x000 ") + config.THUMBS_SIG_IMMM):
+        elif (bstrSig == config.THUMBS_SIG_IMMMP):
             dictHead["FileType"] = config.THUMBS_TYPE_IMMM
             iInitialOffset = 4
         else:  # ...Header Signature not found...
@@ -128,106 +254,236 @@ class Processor():
         if (config.ARGS.htmlrep):  # ...implies config.ARGS.outdir
             config.HTTP_REPORT = report.HtmlReport(utils.getEncoding(), config.ARGS.outdir, dictHead)
 
-        if (dictHead["FileType"] == config.THUMBS_TYPE_OLE):
-            thumbOLE.process(dictHead["FilePath"], fileThumbsDB, dictHead["FileSize"])
-        elif (dictHead["FileType"] == config.THUMBS_TYPE_CMMM):
-            thumbCMMM.process(dictHead["FilePath"], fileThumbsDB, dictHead["FileSize"])
-        elif (dictHead["FileType"] == config.THUMBS_TYPE_IMMM):
-            thumbIMMM.process(dictHead["FilePath"], fileThumbsDB, dictHead["FileSize"], iInitialOffset)
-        else:  # ...should never hit this as dictHead["FileType"] is set in prior "if" block above,
-            # ...dictHead["FileType"] should always be set properly
-            strMsg = "No process for Header Signature in " + dictHead["FilePath"]
-            if (config.ARGS.mode == "f"):
-                raise verror.ProcessError(" Error (Process): " + strMsg)
-            elif (config.ARGS.verbose >= 0):
-                sys.stderr.write(" Warning: " + strMsg + "\n")
+        try:
+            if (dictHead["FileType"] == config.THUMBS_TYPE_OLE):
+                thumbOLE.process(dictHead["FilePath"], mapThumbsDB, dictHead["FileSize"])
+            elif (dictHead["FileType"] == config.THUMBS_TYPE_CMMM):
+                thumbCMMM.process(dictHead["FilePath"], mapThumbsDB, dictHead["FileSize"])
+            elif (dictHead["FileType"] == config.THUMBS_TYPE_IMMM):
+                thumbIMMM.process(dictHead["FilePath"], mapThumbsDB, dictHead["FileSize"], iInitialOffset)
+            else:  # ...should never hit this as dictHead["FileType"] is set in prior "if" block above,
+                # ...dictHead["FileType"] should always be set properly
+                strMsg = "No process for Header Signature in " + dictHead["FilePath"]
+                if (config.ARGS.mode == "f"):
+                    raise verror.ProcessError(" Error (Process): " + strMsg)
+                elif (config.ARGS.verbose >= 0):
+                    sys.stderr.write(" Warning: " + strMsg + "\n")
+        finally:
+            # Write the file's symlink log lines, even if processing stopped on an error...
+            utils.writeSymlinkLog()
 
         return
 
 
     def processDirectory(self, thumbDir, filenames = None):
-        # Search for thumbnail cache files:
-        #  Thumbs.db, ehthumbs.db, ehthumbs_vista.db, Image.db, Video.db, TVThumb.db, and musicThumbs.db
-        #
-        #  thumbcache_*.db (2560, 1920, 1600, 1280, 1024, 768, 256, 96, 48, 32, 16, sr, wide, exif, wide_alternate, custom_stream)
-        #  iconcache_*.db
-
-        #includes = ['*humbs.db', '*humbs_*.db', 'Image.db', 'Video.db', 'TVThumb.db', 'thumbcache_*.db', 'iconcache_*.db']
-        includes = ['*.db']
-
+        # Search for thumbnail cache files (see INCLUDES)...
         if (filenames == None):
-            filenames = []
-            with os.scandir(thumbDir) as iterFiles:
-                for fileEntry in iterFiles:
-                    if fileEntry.is_file():
-                        filenames.append(fileEntry.name)
+            filenames = self.getDirFileNames(thumbDir)
 
         # Include files...
-        tc_files = []
-        for pattern in includes:
-            for filename in fnmatch.filter(filenames, pattern):
-                tc_files.append(os.path.join(thumbDir, filename))
+        #   The directory prefix (with its ending separator) is joined once for all its files
+        strPrefix = os.path.join(os.fspath(thumbDir), "")
+        #   The files are generated as they are processed rather than listed first
+        tc_files = (strPrefix + filename for filename in filenames if isIncluded(filename))
 
         # TODO: Check for "Thumbs.db" file and related image files in current directory
         # TODO: This may involve passing info into processThumbFile() and following functionality
         # TODO: to check existing image file names against stored thumbnail IDs
 
-        for thumbFile in tc_files:
-            self.processThumbFile(thumbFile, filenames)
+        self.processThumbFiles(tc_files, filenames)
+
+        return
+
+
+    def getDirFileNames(self, thumbDir):
+        # Get the names of the files in a directory from one directory scan...
+        #   The entries' file types come with the scan, so no stat call per file is needed
+        filenames = []
+        with os.scandir(thumbDir) as iterFiles:
+            for fileEntry in iterFiles:
+                if fileEntry.is_file():
+                    filenames.append(fileEntry.name)
+        return filenames
+
+
+    def processThumbFiles(self, thumbFiles, filenames = None):
+        # Process the given Thumbnail files (any iterable)...
+        #   Parallel jobs need the files counted, so only then are they listed
+        if (config.ARGS.jobs > 1):
+            thumbFiles = list(thumbFiles)
+        if (config.ARGS.jobs < 2 or len(thumbFiles) < 2):
+            processThumbFile = self.processThumbFile  # ...local lookup for the files loop
+            for thumbFile in thumbFiles:
+                processThumbFile(thumbFile, filenames)
+            return
+
+        # Process the files in parallel, reporting each file's output in order...
+        if (self.executor != None):
+            self.reportThumbFiles(self.executor, thumbFiles, filenames)
+            return
+
+        with self.getExecutor(min(config.ARGS.jobs, len(thumbFiles))) as executor:
+            self.reportThumbFiles(executor, thumbFiles, filenames)
+
+        return
+
+
+    def getExecutor(self, iJobs):
+        # Get a new pool of worker processes initialized with this process's settings...
+        return ProcessPoolExecutor(max_workers = iJobs,
+                                   initializer = initWorker, initargs = (config.ARGS,))
+
+
+    def reportThumbFiles(self, executor, thumbFiles, filenames):
+        # Process the files in the pool, reporting the workers' results in order...
+        #   As when run serially, the first error stops the run: the files not yet started
+        #   are cancelled (the files already running are finished, but not reported)
+        listFutures = [executor.submit(processThumbFileWorker, thumbFile, filenames) for thumbFile in thumbFiles]
+        for (iIndex, futureFile) in enumerate(listFutures):
+            (strOut, strErr, strSymlinks, errorRaised) = futureFile.result()
+            sys.stdout.write(strOut)
+            sys.stderr.write(strErr)
+            if (strSymlinks):
+                config.LIST_SYMLINKS.append(strSymlinks)
+                utils.writeSymlinkLog()
+            if (errorRaised != None):
+                for futureLater in listFutures[iIndex + 1:]:
+                    futureLater.cancel()
+                raise errorRaised
+
+        return
+
+
+    def processWithExecutor(self, funcProcess):
+        # Run a multiple directory process...
+        #   For parallel jobs, one pool of worker processes is started for all the directories.
+        #   Each directory's files are finished before the next directory so that same named
+        #   outputs from different directories are still overwritten in processing order.
+        if (config.ARGS.jobs > 1):
+            self.executor = self.getExecutor(config.ARGS.jobs)
+        try:
+            funcProcess()
+        finally:
+            if (self.executor != None):
+                self.executor.shutdown()
+                self.executor = None
 
         return
 
 
     def processRecursiveDirectory(self):
-        # Walk the directories from given directory recursively down...
-        for dirpath, dirnames, filenames in os.walk(config.ARGS.infile):
-            self.processDirectory(dirpath, filenames)
+        # Process the directories from given directory recursively down...
+        self.processWithExecutor(self.__processRecursiveDirectory)
+
+        return
+
+
+    def __processRecursiveDirectory(self):
+        processDirectory = self.processDirectory  # ...local lookup for the directories loop
+        for (strDir, filenames) in self.walkDirectories(config.ARGS.infile):
+            processDirectory(strDir, filenames)
 
         return
 
 
+    def walkDirectories(self, strTopDir):
+        # Walk the directories from given directory recursively down, generating each
+        #   directory's path and file names...
+        #   Each directory is scanned once: its entries give both the file names and the
+        #   subdirectories to walk (top down, in scan order, not following directory links).
+        #   Unlike os.walk(), no list of subdirectory names is built for the caller.
+        scandir = os.scandir  # ...local lookup for the directories loop
+
+        listDirs = [strTopDir]
+        while (listDirs):
+            strDir = listDirs.pop()
+            filenames = []
+            listSubDirs = []
+            try:
+                with scandir(strDir) as iterEntries:
+                    for entry in iterEntries:
+                        try:
+                            bIsDir = entry.is_dir()
+                        except OSError:
+                            bIsDir = False
+                        if (bIsDir):
+                            if (not entry.is_symlink()):
+                                listSubDirs.append(entry.path)
+                        else:
+                            filenames.append(entry.name)
+            except OSError:
+                continue  # ...unreadable directory, skip it
+
+            listDirs.extend(reversed(listSubDirs))
+
+            yield (strDir, filenames)
+
+
     def processFileSystem(self):
         #
         # Process well known Thumb Cache DB files with ESE DB enhancement (if available)
         #
+        self.processWithExecutor(self.__processFileSystem)
+
+        return
+
+
+    def __processFileSystem(self):
 
         strUserBaseDirVista = os.path.join(config.ARGS.infile, config.OS_WIN_USERS_VISTA)
         strUserBaseDirXP = os.path.join(config.ARGS.infile, config.OS_WIN_USERS_XP)
 
         # Vista+
         # ============================================================
-        if os.path.isdir(strUserBaseDirVista):
+        # Open the users directory directly instead of probing it first...
+        iterDirs = self.openUserBaseDir(strUserBaseDirVista)
+        if (iterDirs != None):
             if (config.ARGS.verbose > 0):
                 sys.stderr.write(" Info: FS - Detected a Windows Vista-like partition, processing each user's Thumbcache DB files\n")
             # For Vista+, only process the User's Explorer subdirectory containing Thumbcache DB files...
-            with os.scandir(strUserBaseDirVista) as iterDirs:
+            with iterDirs:
                 for entryUserDir in iterDirs:
                     if not entryUserDir.is_dir():
                         continue
                     userThumbsDir = os.path.join(entryUserDir.path, config.OS_WIN_THUMBCACHE_DIR)
-                    if not os.path.exists(userThumbsDir):  # ...NOT exists?
+                    # Scan the directory directly instead of probing it first...
+                    try:
+                        filenames = self.getDirFileNames(userThumbsDir)
+                    except (FileNotFoundError, NotADirectoryError):  # ...NOT exists?
                         if (config.ARGS.verbose >= 0):
                             sys.stderr.write(" Warning: Skipping %s - does not contain %s\n" % (entryUserDir.path, config.OS_WIN_THUMBCACHE_DIR))
-                    else:
-                        self.processDirectory(userThumbsDir)
+                        continue
+                    self.processDirectory(userThumbsDir, filenames)
+
+            return
 
         # XP
         # ============================================================
-        elif os.path.isdir(strUserBaseDirXP):
+        iterDirs = self.openUserBaseDir(strUserBaseDirXP)
+        if (iterDirs != None):
             if (config.ARGS.verbose > 0):
                 sys.stderr.write(" Info: FS - Detected a Windows XP-like partition, processing all user subdirectories\n")
             # For XP, only process each User's subdirectories...
-            with os.scandir(strUserBaseDirXP) as iterDirs:
+            with iterDirs:
                 for entryUserDir in iterDirs:
                     if not entryUserDir.is_dir():
                         continue
                     self.processDirectory(entryUserDir)
 
+            return
+
         # Other / Unidentified
         # ============================================================
-        else:
-            if (config.ARGS.verbose > 0):
-                sys.stderr.write(" Info: FS - Generic partition, processing all subdirectories (recursive operating mode)\n")
-            self.processDirectory(config.ARGS.infile)
+        if (config.ARGS.verbose > 0):
+            sys.stderr.write(" Info: FS - Generic partition, processing all subdirectories (recursive operating mode)\n")
+        self.processDirectory(config.ARGS.infile)
 
         return
+
+
+    def openUserBaseDir(self, strUserBaseDir):
+        # Return a scandir iterator for a users base directory or None when it is not a directory...
+        try:
+            return os.scandir(strUserBaseDir)
+        except (FileNotFoundError, NotADirectoryError):  # ...NOT exists?
+            return None
@@ -33,8 +33,7 @@ file_micro = "10"
 
 
 from time import time
-from os.path import dirname, basename, abspath, getmtime
-from pkg_resources import resource_filename
+from os.path import dirname, basename, abspath
 
 import vinetto.version as version
 import vinetto.config as config
@@ -42,12 +41,6 @@ import vinetto.error as verror
 import vinetto.utils as utils
 
 
-HTTP_HEADER  = []
-HTTP_TYPE    = []
-HTTP_PIC_ROW = []
-HTTP_ORPHANS = []
-HTTP_FOOTER  = []
-
 IMGTAG = "<img src=\"__TNIMAGE__\" alt=\"__TNALT__\" />"
 
 IMGCOLS = 7
@@ -66,7 +59,6 @@ class Report:
         self.dictHead = dictHead
         self.dictHead["Filename"] = basename(dictHead["FilePath"])
         self.dictHead["Path"] = abspath(dictHead["FilePath"])
-        self.dictHead["ModifyTime"] = getmtime(dictHead["FilePath"])
 
         self.dictMeta = {}
 
@@ -83,27 +75,32 @@ class HtmlReport(Report):
         Report.__init__(self, strCharSet, strOutputDir, dictHead)
         self.iRow = 0
 
-        # Load HTTP sections...
+        # Load HTTP sections (per report, so each file's report stands alone)...
+        self.listHttpHeader  = []
+        self.listHttpType    = []
+        self.listHttpPicRow  = []
+        self.listHttpOrphans = []
+        self.listHttpFooter  = []
         iSeparatorID = 0
-        for strLine in open(resource_filename('vinetto', 'data/HtmlReportTemplate.html'), "r").readlines():
+        for strLine in open(utils.getDataFileName("HtmlReportTemplate.html"), "r").readlines():
             if strLine.find("__ITS__") >= 0:
                 iSeparatorID += 1
                 continue
 
             if (iSeparatorID == 0):
-                HTTP_HEADER.append(strLine)
+                self.listHttpHeader.append(strLine)
             elif (iSeparatorID == 1 and self.dictHead["FileType"] == config.THUMBS_TYPE_OLE):
-                HTTP_TYPE.append(strLine)
+                self.listHttpType.append(strLine)
             elif (iSeparatorID == 2 and self.dictHead["FileType"] == config.THUMBS_TYPE_CMMM):
-                HTTP_TYPE.append(strLine)
+                self.listHttpType.append(strLine)
             elif (iSeparatorID == 3 and self.dictHead["FileType"] == config.THUMBS_TYPE_IMMM):
-                HTTP_TYPE.append(strLine)
+                self.listHttpType.append(strLine)
             elif (iSeparatorID == 4):
-                HTTP_PIC_ROW.append(strLine)
+                self.listHttpPicRow.append(strLine)
             elif (iSeparatorID == 5):
-                HTTP_ORPHANS.append(strLine)
+                self.listHttpOrphans.append(strLine)
             elif (iSeparatorID == 6):
-                HTTP_FOOTER.append(strLine)
+                self.listHttpFooter.append(strLine)
 
         self.listIDs        = []
         self.listFileNames  = []
@@ -201,7 +198,7 @@ class HtmlReport(Report):
             self.repfile = open(strFileName, "w")
         except:
             raise verror.ReportError(" Error (Report): Cannot create " + strFileName)
-        for strLine in HTTP_HEADER:
+        for strLine in self.listHttpHeader:
             strLine = strLine.replace("__CHARSET__",    self.strCharSet)
             strLine = strLine.replace("__DATEREPORT__", "Report Date: " + utils.getFormattedTimeUTC( time() ))
             strLine = strLine.replace("__TDBDIRNAME__", self.dictHead["Path"])
@@ -216,7 +213,7 @@ class HtmlReport(Report):
 
     def __writeMeta(self):
         # Write report type...
-        for strLine in HTTP_TYPE:
+        for strLine in self.listHttpType:
             # Adjust Type 1 (OLE, Thumbs.db)...
             if (self.dictHead["FileType"] == config.THUMBS_TYPE_OLE):
                 strLine = strLine.replace("__TDBRECOLOR__",  "%d (%s)" % (self.dictMeta["color"], "Black" if self.dictMeta["color"] else "Red"))
@@ -268,7 +265,7 @@ class HtmlReport(Report):
 
         # Process a report line...
         self.iRow += 1
-        for strLine in HTTP_PIC_ROW:
+        for strLine in self.listHttpPicRow:
             # Row Number...
             strLine = strLine.replace("__ROWNUMBER__", str(self.iRow) + ":")
             # Fill cells in row...
@@ -334,7 +331,7 @@ class HtmlReport(Report):
             return
 
         # Print orphan catalog entries...
-        for strLine in HTTP_ORPHANS:
+        for strLine in self.listHttpOrphans:
             if "__TNORPHAN__" not in strLine:
                 self.repfile.write(strLine)
             else:
@@ -346,7 +343,7 @@ class HtmlReport(Report):
 
     def __close(self, strCounts, strStats):
         # Write report footer...
-        for strLine in HTTP_FOOTER:
+        for strLine in self.listHttpFooter:
             strLine = strLine.replace("__COUNTSTATS__", strCounts)
             strLine = strLine.replace("__TYPESTATS__", strStats)
             strLine = strLine.replace("__VERSION__", "Vinetto " + version.STR_VERSION)
@@ -33,8 +33,6 @@ file_micro = "5"
 
 from collections.abc import MutableMapping
 
-unicode = str
-
 
 ###############################################################################
 # Vinetto Thumb Database Catalog Class
@@ -64,7 +62,7 @@ class TDB_Catalog(MutableMapping):
         bStreamID = None
         if isinstance(key, int):
             bStreamID = True
-        elif isinstance(key, unicode):
+        elif isinstance(key, str):
             bStreamID = False
         else:
             raise TypeError("Invalid: Stream key must be an integer or string representing a thumbnail ID/name!")
@@ -87,9 +85,9 @@ class TDB_Catalog(MutableMapping):
                 raise TypeError("Not tuple: Catalog value must be a list of 2-tuples or a 2-tuple!")
             if (len(tupleItem) != 2):
                 raise ValueError("Not 2-tuple: Catalog value must be a list of 2-tuples or a 2-tuple!")
-            if not (isinstance(tupleItem[0], str) or isinstance(tupleItem[0], unicode)):
+            if not (isinstance(tupleItem[0], str)):
                 raise ValueError("Not a string: Catalog 2-tuples must have string (timestamp) for index 0!")
-            if not (isinstance(tupleItem[1], str) or isinstance(tupleItem[1], unicode)):
+            if not (isinstance(tupleItem[1], str)):
                 raise ValueError("Not a string: Catalog 2-tuples must have string (name) for index 1!")
 
         bKeyExists = bool(key in self.__tdbCatalog)
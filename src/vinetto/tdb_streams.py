@@ -37,8 +37,6 @@ import sys
 from collections.abc import MutableMapping
 import vinetto.config as config
 
-unicode = str
-
 
 
 ###############################################################################
@@ -69,7 +67,7 @@ class TDB_Streams(MutableMapping):
         bStreamID = None
         if isinstance(key, int):
             bStreamID = True
-        elif isinstance(key, unicode):
+        elif isinstance(key, str):
             bStreamID = False
         else:
             raise TypeError("Invalid: Stream key must be an integer or string representing a thumbnail ID/name!")
@@ -86,9 +84,9 @@ class TDB_Streams(MutableMapping):
             raise TypeError("Not list: Stream value must be a list of 2 items - file extension string and file name string!")
         if (len(value) != 2):
             raise ValueError("Not 2 items: Stream value must be a list of 2 items - file extension string and file name string!")
-        if not (isinstance(value[0], str) or isinstance(value[0], unicode)):
+        if not (isinstance(value[0], str)):
             raise TypeError("Not string: Stream value[0] must be a file extension string!")
-        if not (isinstance(value[1], str) or isinstance(value[1], unicode)):
+        if not (isinstance(value[1], str)):
             raise TypeError("Not string: Stream value[1] must be a file name string!")
 
         if (key in self.__tdbStreams):  # ...append a Stream entry...
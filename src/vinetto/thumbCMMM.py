@@ -33,8 +33,7 @@ file_micro = "10"
 
 
 import sys
-from io import StringIO
-from struct import unpack
+from struct import Struct
 
 import vinetto.config as config
 import vinetto.esedb as esedb
@@ -43,39 +42,75 @@ import vinetto.tdb_streams as tdb_streams
 import vinetto.utils as utils
 
 
+# Header Structures (the fields following the "CMMM" signature)...
+#   Format Type, Cache Type
+#   1st Cache Offset, 1st Available Cache Offset
+#   Cache Count (below Windows 8 v3)
+CMMM_HEAD        = Struct("<LL")
+CMMM_HEAD_OFFSET = Struct("<LL")
+CMMM_HEAD_COUNT  = Struct("<L")
+
+# Cache Entry Structures (the fixed fields following the "CMMM" signature)...
+#   Vista:  Size, Hash, Extension, ID Size, Pad Size, Data Size,                Reserved, Data Checksum, Head Checksum
+#   Win7:   Size, Hash,            ID Size, Pad Size, Data Size,                Reserved, Data Checksum, Head Checksum
+#   Win8+:  Size, Hash,            ID Size, Pad Size, Data Size, Width, Height, Reserved, Data Checksum, Head Checksum
+CMMM_ENTRY_VISTA = Struct("<LQ8sLLLLQQ")
+CMMM_ENTRY_WIN7  = Struct("<LQLLLLQQ")
+CMMM_ENTRY_WIN8  = Struct("<LQLLLLLLQQ")
+
+# Image data types detected by magic bytes...
+IMAGE_TYPES = (
+        ( b'\x42\x4D', "bmp" ),                         # BM
+        ( b'\xFF\xD8\xFF\xE0', "jpg" ),                 # ....
+        ( b'\x89\x50\x4E\x47\x0D\x0A\x1A\x0A', "png" )  # .PNG\n\r\sub\r
+    )
+
+
 def printHead(dictCMMMMeta):
-    print("     Signature: %s" % config.THUMBS_FILE_TYPES[config.THUMBS_TYPE_CMMM])
-    print("        Format: %d (%s)" % (dictCMMMMeta["FormatType"], dictCMMMMeta["FormatTypeStr"]))
-    print("          Type: %d (%s)" % (dictCMMMMeta["CacheType"], dictCMMMMeta["CacheTypeStr"]))
+    # Print the header as one write...
+    listLines = [
+        "     Signature: %s" % config.THUMBS_FILE_TYPES[config.THUMBS_TYPE_CMMM],
+        "        Format: %d (%s)" % (dictCMMMMeta["FormatType"], dictCMMMMeta["FormatTypeStr"]),
+        "          Type: %d (%s)" % (dictCMMMMeta["CacheType"], dictCMMMMeta["CacheTypeStr"]),
+    ]
     if (config.ARGS.verbose > 0):
-        print("    Cache Info:")
-        print("          Offset: %s" % str(dictCMMMMeta["CacheOff1st"]))
-        print("   1st Available: %s" % str(dictCMMMMeta["CacheOff1stAvail"]))
-        print("           Count: %s" % str(dictCMMMMeta["CacheCount"]))
+        listLines.extend((
+            "    Cache Info:",
+            "          Offset: %s" % str(dictCMMMMeta["CacheOff1st"]),
+            "   1st Available: %s" % str(dictCMMMMeta["CacheOff1stAvail"]),
+            "           Count: %s" % str(dictCMMMMeta["CacheCount"]),
+        ))
+    listLines.append("")
+    sys.stdout.write("\n".join(listLines))
     return
 
 
 def printCache(strSig, iSize, strHash, strExt, iIdSize, iPadSize, iDataSize, iWidth, iHeight, iChkSumD, iChkSumH, keyStreamName):
-    print("     Signature: %s" % strSig)
+    # Print the entry as one write...
+    listLines = [ "     Signature: %s" % strSig ]
     if (config.ARGS.verbose > 0):
-        print("          Size: %s" % str(iSize))
-        print("          Hash: %s" % str(strHash))
-        print("     Extension: %s" % str(strExt))
-        print("       ID Size: %s" % str(iIdSize))
-        print("      Pad Size: %s" % str(iPadSize))
-        print("     Data Size: %s" % str(iDataSize))
-        print("  Image  Width: %s" % str(iWidth))
-        print("  Image Height: %s" % str(iHeight))
-        print(" Data Checksum: %s" % str(iChkSumD))
-        print(" Head Checksum: %s" % str(iChkSumH))
-    print("            ID: %s" % keyStreamName)
+        listLines.extend((
+            "          Size: %s" % str(iSize),
+            "          Hash: %s" % str(strHash),
+            "     Extension: %s" % str(strExt),
+            "       ID Size: %s" % str(iIdSize),
+            "      Pad Size: %s" % str(iPadSize),
+            "     Data Size: %s" % str(iDataSize),
+            "  Image  Width: %s" % str(iWidth),
+            "  Image Height: %s" % str(iHeight),
+            " Data Checksum: %s" % str(iChkSumD),
+            " Head Checksum: %s" % str(iChkSumH),
+        ))
+    listLines.append("            ID: %s" % keyStreamName)
+    listLines.append("")
+    sys.stdout.write("\n".join(listLines))
     if (config.ARGS.verbose > 0):
         if (config.ARGS.edbfile != None):
             config.ESEDB.printInfo()
     return
 
 
-def process(infile, fileThumbsDB, iThumbsDBSize):
+def process(infile, mapThumbsDB, iThumbsDBSize):
     # tDB_endian = "<" ALWAYS Little???
 
     if (iThumbsDBSize < 24):
@@ -85,16 +120,13 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
 
     # Header...
     dictCMMMMeta = {}
-    fileThumbsDB.seek(4)
+    iOffset = 4
 
-    dictCMMMMeta["FormatType"]       = unpack("<L", fileThumbsDB.read(4))[0]
-    dictCMMMMeta["FormatTypeStr"]    = "Unknown Format"
-    try:
-        dictCMMMMeta["FormatTypeStr"] = list(config.TC_FORMAT_TYPE.keys())[list(config.TC_FORMAT_TYPE.values()).index(dictCMMMMeta["FormatType"])]
-    except:
-        pass
+    (dictCMMMMeta["FormatType"],
+     dictCMMMMeta["CacheType"])      = CMMM_HEAD.unpack_from(mapThumbsDB, iOffset)
+    iOffset += CMMM_HEAD.size
+    dictCMMMMeta["FormatTypeStr"]    = config.TC_FORMAT_TYPE_INV.get(dictCMMMMeta["FormatType"], "Unknown Format")
 
-    dictCMMMMeta["CacheType"]        = unpack("<L", fileThumbsDB.read(4))[0]
     dictCMMMMeta["CacheTypeStr"] = "Unknown Type"
     try:
         dictCMMMMeta["CacheTypeStr"] = ("thumbcache_" +
@@ -104,13 +136,14 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
         pass
 
     if (dictCMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 8")):
-        reserved01 = fileThumbsDB.read(4)  # Skip an integer size
+        iOffset += 4  # Skip an integer size
 
-    dictCMMMMeta["CacheOff1st"]      = unpack("<L", fileThumbsDB.read(4))[0]
-    dictCMMMMeta["CacheOff1stAvail"] = unpack("<L", fileThumbsDB.read(4))[0]
+    (dictCMMMMeta["CacheOff1st"],
+     dictCMMMMeta["CacheOff1stAvail"]) = CMMM_HEAD_OFFSET.unpack_from(mapThumbsDB, iOffset)
+    iOffset += CMMM_HEAD_OFFSET.size
     dictCMMMMeta["CacheCount"]       = None  # Cache Count not available above Windows 8 v2
     if (dictCMMMMeta["FormatType"] < config.TC_FORMAT_TYPE.get("Windows 8 v3")):
-        dictCMMMMeta["CacheCount"]   = unpack("<L", fileThumbsDB.read(4))[0]
+        dictCMMMMeta["CacheCount"]   = CMMM_HEAD_COUNT.unpack_from(mapThumbsDB, iOffset)[0]
 
 
     if (config.ARGS.verbose >= 0):
@@ -128,61 +161,68 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
     tdbStreams = tdb_streams.TDB_Streams()
     tdbCatalog = tdb_catalog.TDB_Catalog()
 
+    # Set the output path prefixes once for the entries...
+    strOutDir = config.ARGS.outdir
+    strThumbsPrefix = config.THUMBS_SUBDIR + "/"
+
+    # Bind the run's settings once for the entry loop...
+    iVerbose = config.ARGS.verbose
+    bSymlinks = config.ARGS.symlinks
+    strSep = config.STR_SEP
+    decodeBytes = utils.decodeBytes
+
+    # Select the Cache Entry Structure for the format...
+    #   File Extension not available above Windows Vista
+    #   Image Width and Height not available below Windows 8
+    if (dictCMMMMeta["FormatType"] == config.TC_FORMAT_TYPE.get("Windows Vista")):
+        structEntry = CMMM_ENTRY_VISTA
+    elif (dictCMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 7")):
+        structEntry = CMMM_ENTRY_WIN8
+    else:
+        structEntry = CMMM_ENTRY_WIN7
+
     iOffset = dictCMMMMeta["CacheOff1st"]
     iCacheCounter = 1
     while (True):
         if (iThumbsDBSize < (iOffset + 48)):
-            if (config.ARGS.verbose >= 0):
+            if (iVerbose >= 0):
                 sys.stderr.write(" Warning: Remaining cache entry %d too small to process\n" % iCacheCounter)
             break
 
-        fileThumbsDB.seek(iOffset)
-        tDB_sig = fileThumbsDB.read(4)
+        tDB_sig = mapThumbsDB[iOffset:iOffset + 4]
         if (tDB_sig != config.THUMBS_SIG_CMMM):
             break
-        tDB_size = unpack("<L", fileThumbsDB.read(4))[0]
-        tDB_hash = unpack("<Q", fileThumbsDB.read(8))[0]
-        iOffset += 16
-
-        tDB_ext = None  # File Extension not available above Windows Vista
-        if (dictCMMMMeta["FormatType"] == config.TC_FORMAT_TYPE.get("Windows Vista")):
-            tDB_ext = fileThumbsDB.read(8)  # 2 bytes * 4 wchar_t characters
-            iOffset += 8
-
-        tDB_idSize   = unpack("<L",  fileThumbsDB.read(4))[0]
-        tDB_padSize  = unpack("<L",  fileThumbsDB.read(4))[0]
-        tDB_dataSize = unpack("<L",  fileThumbsDB.read(4))[0]
-        iOffset += 12
-
-        tDB_width  = None  # Image Width  not available below Windows 8
-        tDB_height = None  # Image Height not available below Windows 8
-        if (dictCMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 7")):
-            tDB_width  = unpack("<L",  fileThumbsDB.read(4))[0]
-            tDB_height = unpack("<L",  fileThumbsDB.read(4))[0]
-            iOffset += 8
-
-        reserved02   = unpack("<L",  fileThumbsDB.read(4))[0]
-        tDB_chksumD  = unpack("<Q",  fileThumbsDB.read(8))[0]
-        tDB_chksumH  = unpack("<Q",  fileThumbsDB.read(8))[0]
-        iOffset += 20
+        tDB_ext    = None
+        tDB_width  = None
+        tDB_height = None
+        if (structEntry is CMMM_ENTRY_WIN8):
+            (tDB_size, tDB_hash, tDB_idSize, tDB_padSize, tDB_dataSize, tDB_width, tDB_height,
+             reserved02, tDB_chksumD, tDB_chksumH) = structEntry.unpack_from(mapThumbsDB, iOffset + 4)
+        elif (structEntry is CMMM_ENTRY_WIN7):
+            (tDB_size, tDB_hash, tDB_idSize, tDB_padSize, tDB_dataSize,
+             reserved02, tDB_chksumD, tDB_chksumH) = structEntry.unpack_from(mapThumbsDB, iOffset + 4)
+        else:  # ...Vista: Extension is 2 bytes * 4 wchar_t characters
+            (tDB_size, tDB_hash, tDB_ext, tDB_idSize, tDB_padSize, tDB_dataSize,
+             reserved02, tDB_chksumD, tDB_chksumH) = structEntry.unpack_from(mapThumbsDB, iOffset + 4)
+        iOffset += 4 + structEntry.size
 
         tDB_id = None
         if (tDB_idSize > 0):
-            tDB_id   = fileThumbsDB.read(tDB_idSize)
+            tDB_id   = mapThumbsDB[iOffset:iOffset + tDB_idSize]
+        iOffset += tDB_idSize
         tDB_pad = None
         if (tDB_padSize > 0):
-            tDB_pad  = fileThumbsDB.read(tDB_padSize)
-        tDB_data = None
-        if (tDB_dataSize > 0):
-            tDB_data = fileThumbsDB.read(tDB_dataSize)
-
-        iOffset += (tDB_idSize + tDB_padSize + tDB_dataSize)
+            tDB_pad  = mapThumbsDB[iOffset:iOffset + tDB_padSize]
+        iOffset += tDB_padSize
+        # The data is not copied: it is written from a view of the mapped file (see below)...
+        iDataOffset = iOffset
+        iOffset += tDB_dataSize
 
         # Set default Stream Name key to add to Thumb DB Streams (tdbStreams) dict...
         #   Key may be str or int
         keyStreamName = None
         if (tDB_id != None):
-            keyStreamName = utils.decodeBytes(tDB_id)
+            keyStreamName = decodeBytes(tDB_id)
         else:
             continue  # ...no ID, so probably empty last entry
 
@@ -191,17 +231,14 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
         strExt = None
         # Try the given Vista ext...
         if (tDB_ext != None):
-            strExt = utils.decodeBytes(tDB_ext)
+            strExt = decodeBytes(tDB_ext)
         if (tDB_dataSize > 0):
             # Detect data type ext by magic bytes...
-            tupleImageTypes = (
-                    ( bytearray(b'\x42\x4D'), "bmp" ),                         # BM
-                    ( bytearray(b'\xFF\xD8\xFF\xE0'), "jpg" ),                 # ....
-                    ( bytearray(b'\x89\x50\x4E\x47\x0D\x0A\x1A\x0A'), "png" )  # .PNG\n\r\sub\r
-                )
-            for tupleImageType in tupleImageTypes:
-                if (tupleImageType[0] == tDB_data[0:len(tupleImageType[0])]):
+            bstrMagic = mapThumbsDB[iDataOffset:iDataOffset + min(tDB_dataSize, 8)]
+            for tupleImageType in IMAGE_TYPES:
+                if (bstrMagic.startswith(tupleImageType[0])):
                     strExt = tupleImageType[1]
+                    break
 
             # If there still is no ext, use a neutral default ".img"...
             if (strExt == None):
@@ -209,7 +246,7 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
         # Otherwise,
         #    No Data, no Ext!
 
-        if (config.ARGS.verbose >= 0):
+        if (iVerbose >= 0):
             print(" Cache Entry %d\n --------------------" % iCacheCounter)
             printCache(tDB_sig.decode(), tDB_size, strHash, strExt, tDB_idSize, tDB_padSize, tDB_dataSize,
                          tDB_width, tDB_height, tDB_chksumD, tDB_chksumH, keyStreamName)
@@ -228,34 +265,32 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
 
             if (strFileName != None):
                 # Setup symbolic link to filename...
-                if (config.ARGS.symlinks):  # ...implies config.ARGS.outdir
-                    strTarget = config.THUMBS_SUBDIR + "/" + strCleanFileName + "." + strExt
-                    utils.setSymlink(strTarget, config.ARGS.outdir + strFileName)
+                if (bSymlinks):  # ...implies config.ARGS.outdir
+                    strTarget = strThumbsPrefix + strCleanFileName + "." + strExt
+                    utils.setSymlink(strTarget, strOutDir + strFileName)
 
-                    fileURL = open(config.ARGS.outdir + config.THUMBS_FILE_SYMS, "a+")
-                    fileURL.write(strTarget + " => " + strFileName + "\n")
-                    fileURL.close()
+                    utils.addSymlinkLog(strTarget, strFileName)
 
                 # Add a "catalog" entry...
                 tdbCatalog[strCleanFileName] = (strCatEntryTimestamp, strFileName)
 
-                if (config.ARGS.verbose >= 0):
+                if (iVerbose >= 0):
                     print("  CATALOG " + strCleanFileName + ":  " + ("%19s" % strCatEntryTimestamp) + "  " + strFileName)
 
             # Write data to filename...
-            if (config.ARGS.outdir != None):
+            if (strOutDir != None):
                 strFileName = tdbStreams.getFileName(strCleanFileName, strExt)
-                fileImg = open(config.ARGS.outdir + strFileName, "wb")
-                fileImg.write(tDB_data)
-                fileImg.close()
+                # The view is released when written, even on an error, so the mapping can be closed...
+                with memoryview(mapThumbsDB)[iDataOffset:iDataOffset + tDB_dataSize] as mvData:
+                    utils.writeDataFile(strOutDir + strFileName, (mvData,))
             else:  # Not extracting...
                 tdbStreams[strCleanFileName] = config.LIST_PLACEHOLDER
 
         # End of Loop
         iCacheCounter += 1
 
-        if (config.ARGS.verbose >= 0):
-            print(config.STR_SEP)
+        if (iVerbose >= 0):
+            print(strSep)
 
         # Check End of File...
         if (iThumbsDBSize <= iOffset):
@@ -33,7 +33,8 @@ file_micro = "9"
 
 
 import sys
-from struct import unpack
+from struct import Struct
+from functools import lru_cache
 
 import vinetto.config as config
 #import vinetto.tdb_catalog as tdb_catalog
@@ -41,52 +42,115 @@ import vinetto.tdb_streams as tdb_streams
 import vinetto.utils as utils
 
 
+# Header Structures (the fields following the "IMMM" signature)...
+#   Format Type, Reserved, Entry Used, Entry Count, Entry Total
+#   Windows 10: 29 unknown values
+IMMM_HEAD         = Struct("<LLLLL")
+IMMM_HEAD_UNKNOWN = Struct("<29L")
+IMMM_HEAD_UNKNOWN_KEYS = tuple("Unknown%02d" % i for i in range(2, 31))
+
+# Cache Entry keys (all formats)...
+IMMM_ENTRY_KEYS = ( "Hash", "FileTime", "Flags",
+                    "16", "32", "48", "96", "256", "768", "1024", "1280", "1600", "1920", "2560",
+                    "sr", "wide", "exif", "wide_alternate", "custom_stream" )
+
+
+@lru_cache(maxsize=None)
+def getEntryStruct(iFormatType):
+    # Return the Cache Entry Structure and its ordered field keys for the given format...
+    #   Built once per format type: a directory run reuses it for every index file
+    listKeys = ["Hash"]
+    if (iFormatType == config.TC_FORMAT_TYPE.get("Windows Vista")):
+        listKeys.append("FileTime")
+    listKeys.append("Flags")
+
+    # Thumbcache File Offsets...
+    if (iFormatType > config.TC_FORMAT_TYPE.get("Windows 7")):
+        listKeys.append("16")
+    listKeys.append("32")
+    if (iFormatType > config.TC_FORMAT_TYPE.get("Windows 7")):
+        listKeys.append("48")
+    listKeys.append("96")
+    listKeys.append("256")
+    if (iFormatType > config.TC_FORMAT_TYPE.get("Windows 8.1")):
+        listKeys.append("768")
+    listKeys.append("1024")
+    if (iFormatType > config.TC_FORMAT_TYPE.get("Windows 8.1")):
+        listKeys.append("1280")
+    if (iFormatType == config.TC_FORMAT_TYPE.get("Windows 8.1")):
+        listKeys.append("1600")
+    if (iFormatType > config.TC_FORMAT_TYPE.get("Windows 8.1")):
+        listKeys.append("1920")
+        listKeys.append("2560")
+    listKeys.append("sr")
+    if (iFormatType > config.TC_FORMAT_TYPE.get("Windows 7")):
+        listKeys.append("wide")
+        listKeys.append("exif")
+    if (iFormatType > config.TC_FORMAT_TYPE.get("Windows 8 v3")):
+        listKeys.append("wide_alternate")
+    if (iFormatType > config.TC_FORMAT_TYPE.get("Windows 8.1")):
+        listKeys.append("custom_stream")
+
+    # Hash and FileTime are 8 bytes, Flags and Offsets are 4 bytes...
+    iQuads = 2 if ("FileTime" in listKeys) else 1
+    structEntry = Struct("<" + "Q" * iQuads + "L" * (len(listKeys) - iQuads))
+    return (structEntry, tuple(listKeys))
+
+
 def printHead(dictIMMMMeta, iFileSize):
-    print("     Signature: %s" % config.THUMBS_FILE_TYPES[config.THUMBS_TYPE_IMMM])
-    print("        Format: %d (%s)" % (dictIMMMMeta["FormatType"], dictIMMMMeta["FormatTypeStr"]))
-    print("          Size: %d" % iFileSize)
-    print("    Entry Info:")
-    print("        Reserved: %s" % str(dictIMMMMeta["Reserved01"]))
-    print("            Used: %s" % str(dictIMMMMeta["EntryUsed"]))
-    print("           Count: %s" % str(dictIMMMMeta["EntryCount"]))
-    print("           Total: %s" % str(dictIMMMMeta["EntryTotal"]))
+    # Print the header as one write...
+    listLines = [
+        "     Signature: %s" % config.THUMBS_FILE_TYPES[config.THUMBS_TYPE_IMMM],
+        "        Format: %d (%s)" % (dictIMMMMeta["FormatType"], dictIMMMMeta["FormatTypeStr"]),
+        "          Size: %d" % iFileSize,
+        "    Entry Info:",
+        "        Reserved: %s" % str(dictIMMMMeta["Reserved01"]),
+        "            Used: %s" % str(dictIMMMMeta["EntryUsed"]),
+        "           Count: %s" % str(dictIMMMMeta["EntryCount"]),
+        "           Total: %s" % str(dictIMMMMeta["EntryTotal"]),
+    ]
     if (config.ARGS.verbose > 1):
         strUnknown = "Unknown"
         for key in  dictIMMMMeta:
             if strUnknown in key:
-                print("      " + strUnknown + " " + key[-2:] + ": " + str(dictIMMMMeta[key]))
+                listLines.append("      " + strUnknown + " " + key[-2:] + ": " + str(dictIMMMMeta[key]))
 
+    listLines.append("")
+    sys.stdout.write("\n".join(listLines))
     return
 
 
 def printCache(dictThumbDBEntry):
     strHash = format(dictThumbDBEntry["Hash"], "016x")
     strFlags = format(dictThumbDBEntry["Flags"], "032b")[2:] # bin(dictThumbDBEntry["Flags"][2:]
-    print("          Hash: %s" % str(strHash))
-    print("        Modify: %s" % utils.getFormattedWinToPyTimeUTC(dictThumbDBEntry["FileTime"]))
-    print("         Flags: %s" % str(strFlags))
-
-    if (config.ARGS.verbose < 1):
-        return
-
-    iNegOne = config.OLE_NONE_BLOCK  # ...filter out unused values
-    if (config.ARGS.verbose > 1):
-        iNegOne = None  # ...show unused, i.e., don't filter
-
-    # Check each offset for use (value), unused (-1), or not present (None)
-    for iIndex in range( len(config.TC_CACHE_ALL) ):
-        key = config.TC_CACHE_ALL[iIndex]
-        # Filter uninteresting entries: None == not read from the file
-        #                                -1  == cleared
-        if (dictThumbDBEntry.get(key) != None and dictThumbDBEntry[key] != iNegOne):
-            print("   Offset % 4s: % 11d  [%s]" % (config.TC_CACHE_ALL_DISPLAY[iIndex],
-                                                   -1 if dictThumbDBEntry[key] == config.OLE_NONE_BLOCK else dictThumbDBEntry[key],
-                                                   format(dictThumbDBEntry[key], "08x")))
-
+    # Print the entry as one write...
+    listLines = [
+        "          Hash: %s" % str(strHash),
+        "        Modify: %s" % utils.getFormattedWinToPyTimeUTC(dictThumbDBEntry["FileTime"]),
+        "         Flags: %s" % str(strFlags),
+    ]
+
+    if (config.ARGS.verbose > 0):
+        iNegOne = config.OLE_NONE_BLOCK  # ...filter out unused values
+        if (config.ARGS.verbose > 1):
+            iNegOne = None  # ...show unused, i.e., don't filter
+
+        # Check each offset for use (value), unused (-1), or not present (None)
+        for iIndex in range( len(config.TC_CACHE_ALL) ):
+            key = config.TC_CACHE_ALL[iIndex]
+            # Filter uninteresting entries: None == not read from the file
+            #                                -1  == cleared
+            if (dictThumbDBEntry.get(key) != None and dictThumbDBEntry[key] != iNegOne):
+                listLines.append("   Offset % 4s: % 11d  [%s]" % (config.TC_CACHE_ALL_DISPLAY[iIndex],
+                                                                  -1 if dictThumbDBEntry[key] == config.OLE_NONE_BLOCK else dictThumbDBEntry[key],
+                                                                  format(dictThumbDBEntry[key], "08x")))
+
+    listLines.append("")
+    sys.stdout.write("\n".join(listLines))
     return
 
 
-def process(infile, fileThumbsDB, iThumbsDBSize, iInitialOffset = 0):
+def process(infile, mapThumbsDB, iThumbsDBSize, iInitialOffset = 0):
     # tDB_endian = "<" ALWAYS
 
     if (iThumbsDBSize < 24):
@@ -99,52 +163,18 @@ def process(infile, fileThumbsDB, iThumbsDBSize, iInitialOffset = 0):
 
     # Header...
     dictIMMMMeta = {}
-    fileThumbsDB.seek(iOffset)
-
-    dictIMMMMeta["FormatType"]       = unpack("<L", fileThumbsDB.read(4))[0]
-    dictIMMMMeta["FormatTypeStr"]    = "Unknown Format"
-    try:
-        dictIMMMMeta["FormatTypeStr"] = list(config.TC_FORMAT_TYPE.keys())[list(config.TC_FORMAT_TYPE.values()).index(dictIMMMMeta["FormatType"])]
-    except:
-        pass
 
-    dictIMMMMeta["Reserved01"] = unpack("<L", fileThumbsDB.read(4))[0]
-    dictIMMMMeta["EntryUsed"]  = unpack("<L", fileThumbsDB.read(4))[0]
-    dictIMMMMeta["EntryCount"] = unpack("<L", fileThumbsDB.read(4))[0]
-    dictIMMMMeta["EntryTotal"] = unpack("<L", fileThumbsDB.read(4))[0]
-    iOffset += 20
+    (dictIMMMMeta["FormatType"],
+     dictIMMMMeta["Reserved01"],
+     dictIMMMMeta["EntryUsed"],
+     dictIMMMMeta["EntryCount"],
+     dictIMMMMeta["EntryTotal"]) = IMMM_HEAD.unpack_from(mapThumbsDB, iOffset)
+    dictIMMMMeta["FormatTypeStr"]    = config.TC_FORMAT_TYPE_INV.get(dictIMMMMeta["FormatType"], "Unknown Format")
+    iOffset += IMMM_HEAD.size
 
     if (dictIMMMMeta["FormatType"] == config.TC_FORMAT_TYPE.get("Windows 10")):
-        dictIMMMMeta["Unknown02"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown03"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown04"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown05"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown06"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown07"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown08"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown09"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown10"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown11"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown12"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown13"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown14"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown15"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown16"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown17"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown18"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown19"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown20"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown21"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown22"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown23"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown24"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown25"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown26"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown27"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown28"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown29"] = unpack("<L", fileThumbsDB.read(4))[0]
-        dictIMMMMeta["Unknown30"] = unpack("<L", fileThumbsDB.read(4))[0]
-        iOffset += 116
+        dictIMMMMeta.update(zip(IMMM_HEAD_UNKNOWN_KEYS, IMMM_HEAD_UNKNOWN.unpack_from(mapThumbsDB, iOffset)))
+        iOffset += IMMM_HEAD_UNKNOWN.size
 
     if (config.ARGS.verbose >= 0):
         print(" Header\n --------------------")
@@ -161,146 +191,73 @@ def process(infile, fileThumbsDB, iThumbsDBSize, iInitialOffset = 0):
     tdbStreams = tdb_streams.TDB_Streams()
     #tdbCatalog = tdb_catalog.TDB_Catalog()
 
-    iCacheCounter = 1
+    # Entry Structure for the format...
+    (structEntry, tupleEntryKeys) = getEntryStruct(dictIMMMMeta["FormatType"])
+    iEntryCount = (iThumbsDBSize - iOffset) // structEntry.size
+
+    # Bind the run's settings once for the entry loop...
+    iVerbose = config.ARGS.verbose
+    strSep = config.STR_SEP
+
     iPrinted = 0
-    while (True):
-        if (iThumbsDBSize < (iOffset + 32)):
-            if (config.ARGS.verbose >= 0):
-                sys.stderr.write(" Warning: %s too small to process cache entry %d\n" % (infile, iCacheCounter))
-            return
-
-        dictThumbDBEntry = {}
-
-        iOffEntry = 0
-        fileThumbsDB.seek(iOffset)
-
-        dictThumbDBEntry["Hash"] = unpack("<Q", fileThumbsDB.read(8))[0]
-        iOffEntry += 8
-
-        dictThumbDBEntry["FileTime"] = None
-        if (dictIMMMMeta["FormatType"] == config.TC_FORMAT_TYPE.get("Windows Vista")):
-            dictThumbDBEntry["FileTime"] = unpack("<Q", fileThumbsDB.read(8))[0]
-            iOffEntry += 8
-
-        dictThumbDBEntry["Flags"] = unpack("<L", fileThumbsDB.read(4))[0]
-        iOffEntry += 4
-
-        # Parse the Thumbcache File Offsets...
-        # ------------------------------------------------------------
-        dictThumbDBEntry["16"] = None
-        if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 7")):
-            dictThumbDBEntry["16"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        dictThumbDBEntry["32"]   = unpack("<L", fileThumbsDB.read(4))[0]
-        iOffEntry += 4
-
-        dictThumbDBEntry["48"] = None
-        if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 7")):
-            dictThumbDBEntry["48"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        dictThumbDBEntry["96"]   = unpack("<L", fileThumbsDB.read(4))[0]
-        iOffEntry += 4
-
-        dictThumbDBEntry["256"]  = unpack("<L", fileThumbsDB.read(4))[0]
-        iOffEntry += 4
-
-        dictThumbDBEntry["768"] = None
-        if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 8.1")):
-            dictThumbDBEntry["768"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        dictThumbDBEntry["1024"] = unpack("<L", fileThumbsDB.read(4))[0]
-        iOffEntry += 4
-
-        dictThumbDBEntry["1280"] = None
-        if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 8.1")):
-            dictThumbDBEntry["1280"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        dictThumbDBEntry["1600"] = None
-        if (dictIMMMMeta["FormatType"] == config.TC_FORMAT_TYPE.get("Windows 8.1")):
-            dictThumbDBEntry["1600"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        dictThumbDBEntry["1920"] = None
-        if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 8.1")):
-            dictThumbDBEntry["1920"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        dictThumbDBEntry["2560"] = None
-        if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 8.1")):
-            dictThumbDBEntry["2560"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        dictThumbDBEntry["sr"]   = unpack("<L", fileThumbsDB.read(4))[0]
-        iOffEntry += 4
-
-        dictThumbDBEntry["wide"] = None
-        if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 7")):
-            dictThumbDBEntry["wide"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        dictThumbDBEntry["exif"] = None
-        if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 7")):
-            dictThumbDBEntry["exif"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        dictThumbDBEntry["wide_alternate"] = None
-        if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 8 v3")):
-            dictThumbDBEntry["wide_alternate"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        dictThumbDBEntry["custom_stream"] = None
-        if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 8.1")):
-            dictThumbDBEntry["custom_stream"] = unpack("<L", fileThumbsDB.read(4))[0]
-            iOffEntry += 4
-
-        # Decide how to print the current Cache Entry...
-        bPrint = 2  # Full Print (DEFAULT)
-        bEmptyOrUnused = (dictThumbDBEntry["Flags"] == 0x0 or dictThumbDBEntry["Flags"] == 0xffffffff)
-        bCompleteEmpty = (dictThumbDBEntry["Hash"] == 0x0 and dictThumbDBEntry["Flags"] == 0x0)
-        if (config.ARGS.verbose < 0):
-            bPrint = 0  # No Print
-        elif (config.ARGS.verbose == 0):
-            if (bEmptyOrUnused):
-                bPrint = 0  # No Print
-            # Otherwise, Full Print
-        elif (config.ARGS.verbose == 1):
-            if (bCompleteEmpty):
-                bPrint = 0  # No Print
-            elif (bEmptyOrUnused):
-                bPrint = 1  # Empty Print
-            # Otherwise, Full Print
-        elif (config.ARGS.verbose == 2):
-            if (bCompleteEmpty):
-                bPrint = 1  # Empty Print
-            # Otherwise, Full Print
-        elif (config.ARGS.verbose > 2):
-            bPrint = 2  # Full Print
-
-        if (bPrint):  # ...not 0
-            print(" Cache Entry %d\n --------------------" % iCacheCounter)
-            if (bPrint == 1):
-                print("   Empty!")
-            else:  # bPrint > 1
-                printCache(dictThumbDBEntry)
-            print(config.STR_SEP)
-            iPrinted += 1
-
-        # TODO: DO MORE!!!
-
-        # End of Loop
-        iCacheCounter += 1
-
-        # Check End of File...
-        iOffset += iOffEntry
-        #if (dictIMMMMeta["FormatType"] > config.TC_FORMAT_TYPE.get("Windows 7")):
-        #    if (iOffEntry < 72):
-        #        iOffset += (72 - iOffEntry)
-        if (iThumbsDBSize <= iOffset):
-            break
+    # Print the Cache Entries...
+    #   Nothing is printed when quiet, so the entries are not parsed then.  Otherwise,
+    #   the print decision only needs the Hash (first) and Flags fields, so an entry's
+    #   dict is only built when it is fully printed.
+    if (iVerbose >= 0):
+        iFlagsIndex = tupleEntryKeys.index("Flags")
+        iCacheCounter = 1
+        # The entries are unpacked from a view of the mapped file.  The view is released when
+        #   done, even on an error, so the mapping can be closed...
+        with memoryview(mapThumbsDB)[iOffset:iOffset + iEntryCount * structEntry.size] as mvEntries:
+            for tupleEntry in structEntry.iter_unpack(mvEntries):
+                # Decide how to print the current Cache Entry...
+                bPrint = 2  # Full Print (DEFAULT)
+                iFlags = tupleEntry[iFlagsIndex]
+                bEmptyOrUnused = (iFlags == 0x0 or iFlags == 0xffffffff)
+                bCompleteEmpty = (tupleEntry[0] == 0x0 and iFlags == 0x0)
+                if (iVerbose == 0):
+                    if (bEmptyOrUnused):
+                        bPrint = 0  # No Print
+                    # Otherwise, Full Print
+                elif (iVerbose == 1):
+                    if (bCompleteEmpty):
+                        bPrint = 0  # No Print
+                    elif (bEmptyOrUnused):
+                        bPrint = 1  # Empty Print
+                    # Otherwise, Full Print
+                elif (iVerbose == 2):
+                    if (bCompleteEmpty):
+                        bPrint = 1  # Empty Print
+                    # Otherwise, Full Print
+                elif (iVerbose > 2):
+                    bPrint = 2  # Full Print
+
+                if (bPrint):  # ...not 0
+                    print(" Cache Entry %d\n --------------------" % iCacheCounter)
+                    if (bPrint == 1):
+                        print("   Empty!")
+                    else:  # bPrint > 1
+                        # Fields not in the format are not present (None)...
+                        dictThumbDBEntry = dict.fromkeys(IMMM_ENTRY_KEYS)
+                        dictThumbDBEntry.update(zip(tupleEntryKeys, tupleEntry))
+                        printCache(dictThumbDBEntry)
+                    print(strSep)
+                    iPrinted += 1
+
+                # TODO: DO MORE!!!
+
+                # End of Loop
+                iCacheCounter += 1
+
+    iCacheCounter = iEntryCount + 1
+    iOffset += iEntryCount * structEntry.size
+
+    # Check End of File...
+    if (iEntryCount == 0 or iThumbsDBSize > iOffset):
+        if (config.ARGS.verbose >= 0):
+            sys.stderr.write(" Warning: %s too small to process cache entry %d\n" % (infile, iCacheCounter))
+        return
 
 #    # TEST Print stats on process...
 #    print("  Printed: %d,  Offset: %d,  Diff %d" % (iPrinted, iOffset, iThumbsDBSize - iOffset))
@@ -36,10 +36,9 @@ import sys
 import os
 import errno
 from io import BytesIO
-from struct import unpack
-from binascii import hexlify
+from struct import Struct
+from array import array
 from numpy import character, intc
-from pkg_resources import resource_filename
 
 import vinetto.config as config
 import vinetto.esedb as esedb
@@ -49,11 +48,52 @@ import vinetto.utils as utils
 import vinetto.error as verror
 
 
+# OLE Header Structures (following the 8 byte File Signature)...
+#   Preamble: CLSID, Minor Version, Version, Byte Order (always read Little Endian)
+#   Remainder: Sector Shift through DISAT Sector Count (read in the file's Byte Order)
+OLE_HEAD_PREAMBLE = Struct("<16sHH2s")
+OLE_HEAD = { "<" : Struct("<HHHLLLLLLLLLL"),
+             ">" : Struct(">HHHLLLLLLLLLL") }
+
+# OLE Sector ID Structure (4 bytes)...
+OLE_SECTOR_ID = { "<" : Struct("<L"),
+                  ">" : Struct(">L") }
+
+# OLE Sector ID array type (4 byte unsigned) for next block tables...
+OLE_SECTOR_ID_ARRAY = ("I" if (array("I").itemsize == 4) else "L")
+
+# OLE Directory Entry Structure (128 bytes, last 4 bytes unused)...
+OLE_DIR_ENTRY = { "<" : Struct("<64sHB?LLL16s4sQQLL"),
+                  ">" : Struct(">64sHB?LLL16s4sQQLL") }
+
+# Thumbs DB Catalog Header Structure: Offset, Version, Thumb Count, Thumb Width, Thumb Height...
+OLE_CATALOG_HEAD = { "<" : Struct("<HHLLL"),
+                     ">" : Struct(">HHLLL") }
+
+# Thumbs DB Catalog Entry Preamble Structure: Entry Length, Entry ID, Timestamp...
+OLE_CATALOG_ENTRY = { "<" : Struct("<LLQ"),
+                      ">" : Struct(">LLQ") }
+
+# Thumbs DB Stream Header 1 Structure: Image Offset, Revision, Length...
+OLE_STREAM_HEAD = { "<" : Struct("<LLH"),
+                    ">" : Struct(">LLH") }
+
+# Thumbs DB Stream Field Structures...
+OLE_USHORT    = { "<" : Struct("<H"),
+                  ">" : Struct(">H") }
+OLE_ULONG     = { "<" : Struct("<L"),
+                  ">" : Struct(">L") }
+
+# Thumbs DB Type 1 Start Of Frame Structure (JPEG, always Big Endian):
+#   Frame Length, Precision, Line Count, Samples per Line, Component Count...
+OLE_TYPE1_FRAME = Struct(">HBHHB")
+
+
 def preparePILOutput():
     # Initialize processing for output...
     if (config.ARGS.outdir != None):
-        # If already attempted to load PIL...
-        if (config.THUMBS_TYPE_OLE_PIL == False):
+        # If already attempted to load PIL (and its support data)...
+        if (config.THUMBS_TYPE_OLE_PIL != None):
             return
 
         # Initializing PIL library for Type 1 image extraction...
@@ -69,9 +109,11 @@ def preparePILOutput():
                                     "          Vinetto will only extract Type 2 thumbnails.\n")
         if (config.THUMBS_TYPE_OLE_PIL == True):
             try:
-                config.THUMBS_TYPE_OLE_PIL_TYPE1_HEADER   = open(resource_filename("vinetto", "data/header"), "rb").read()
-                config.THUMBS_TYPE_OLE_PIL_TYPE1_QUANTIZE = open(resource_filename("vinetto", "data/quantization"), "rb").read()
-                config.THUMBS_TYPE_OLE_PIL_TYPE1_HUFFMAN  = open(resource_filename("vinetto", "data/huffman"), "rb").read()
+                config.THUMBS_TYPE_OLE_PIL_TYPE1_HEADER   = open(utils.getDataFileName("header"), "rb").read()
+                config.THUMBS_TYPE_OLE_PIL_TYPE1_QUANTIZE = open(utils.getDataFileName("quantization"), "rb").read()
+                config.THUMBS_TYPE_OLE_PIL_TYPE1_HUFFMAN  = open(utils.getDataFileName("huffman"), "rb").read()
+                config.THUMBS_TYPE_OLE_PIL_TYPE1_PREFIX   = (config.THUMBS_TYPE_OLE_PIL_TYPE1_HEADER[:20] +
+                                                             config.THUMBS_TYPE_OLE_PIL_TYPE1_QUANTIZE)
             except:
                 # Hard Error!  The header, quantization, and huffman data files are installed
                 #    locally with Vinetto, so missing missing files are bad!
@@ -79,26 +121,70 @@ def preparePILOutput():
     return
 
 
-def nextBlock(fileTDB, listSAT, iCurrentSector, cEndian):
-    # Return next block
-    iSATIndex = iCurrentSector // 128  # ...SAT index for search sector
-    iSATOffset = iCurrentSector % 128  # ...Sector offset within search sector
-    iFileOffset = 512 + listSAT[iSATIndex] * 512 + iSATOffset * 4
-    fileTDB.seek(iFileOffset)
-    return unpack(cEndian+"L", fileTDB.read(4))[0]
+def loadTable(mvTDB, listSAT, cEndian):
+    # Return the next block table for the given SAT sectors...
+    #   Each 512 byte SAT sector holds the next block IDs for 128 blocks, so the
+    #   next block for block N is simply the table's Nth entry
+    #   The sectors are copied as raw IDs into an array, then byte swapped once if the
+    #   file's byte order is not the machine's
+    #   A sector cut short by the end of the file is an error: a partial sector would
+    #   shift the table so later block IDs point at the wrong sectors
+    arrayTable = array(OLE_SECTOR_ID_ARRAY)
+    for iSATSector in listSAT:
+        iFileOffset = 512 + iSATSector * 512
+        with mvTDB[iFileOffset:iFileOffset + 512] as mvSector:
+            if (len(mvSector) != 512):
+                raise verror.EntryError(" Error (Entry): Allocation table sector " + str(iSATSector) + " is beyond the end of file")
+            arrayTable.frombytes(mvSector)
+    if ((cEndian == "<") != (sys.byteorder == "little")):
+        arrayTable.byteswap()
+    return arrayTable
+
+
+def getChain(listTable, iSector):
+    # Return the list of blocks chained from the given block...
+    #   A chain cannot hold more blocks than its table, so stop a (damaged) looping chain there
+    #   The loop only indexes the table: the append and the last block marker are bound locally
+    listChain = []
+    appendChain = listChain.append
+    iLastBlock = config.OLE_LAST_BLOCK
+    for _ in range(len(listTable)):
+        if (iSector == iLastBlock):
+            break
+        appendChain(iSector)
+        iSector = listTable[iSector]
+    return listChain
+
+
+def iterStreamData(listStreamData, iStart, iEnd):
+    # Yield the stream data from iStart to iEnd as views of the stream's sectors...
+    iPos = 0
+    for mvSector in listStreamData:
+        iNext = iPos + len(mvSector)
+        if (iNext > iStart and iPos < iEnd):
+            yield mvSector[max(iStart - iPos, 0):min(iEnd, iNext) - iPos]
+        iPos = iNext
+
+
+def getStreamData(listStreamData, iStart, iEnd):
+    # Return the stream data from iStart to iEnd (copied only once)...
+    return b"".join(iterStreamData(listStreamData, iStart, iEnd))
 
 
 def printHead(strCLSID, iRevisionNo, iVersionNo, cEndian,
                  iSectorSize, iSectorSizeMini, iSAT_TotalSec, iDir1stSec,
                  iStreamSizeMini, iMSAT_1stSec, iMSAT_TotalSec,
                  iDISAT_1stSec, iDISAT_TotalSec):
-    print("     Signature: %s" % config.THUMBS_FILE_TYPES[config.THUMBS_TYPE_OLE])
-    print("      Class ID: %s" % strCLSID)
-    print("      Revision: %d" % iRevisionNo)
-    print("       Version: %d" % iVersionNo)
+    # Print the header as one write...
+    listLines = [
+        "     Signature: %s" % config.THUMBS_FILE_TYPES[config.THUMBS_TYPE_OLE],
+        "      Class ID: %s" % strCLSID,
+        "      Revision: %d" % iRevisionNo,
+        "       Version: %d" % iVersionNo,
+    ]
     if (config.ARGS.verbose > 0):
-        print("        Endian: %s" % ("Little" if (cEndian == "<") else "Big"))
-        print("       DB Info:")
+        listLines.append("        Endian: %s" % ("Little" if (cEndian == "<") else "Big"))
+        listLines.append("       DB Info:")
         if iSectorSize     == config.OLE_LAST_BLOCK: iSectorSize     = None
         if iSectorSizeMini == config.OLE_LAST_BLOCK: iSectorSizeMini = None
         if iSAT_TotalSec   == config.OLE_LAST_BLOCK: iSAT_TotalSec   = None
@@ -108,38 +194,63 @@ def printHead(strCLSID, iRevisionNo, iVersionNo, cEndian,
         if iMSAT_TotalSec  == config.OLE_LAST_BLOCK: iMSAT_TotalSec  = None
         if iDISAT_1stSec   == config.OLE_LAST_BLOCK: iDISAT_1stSec   = None
         if iDISAT_TotalSec == config.OLE_LAST_BLOCK: iDISAT_TotalSec = None
-        print("    SAT  Sec Size: %s" % str(iSectorSize))
-        print("   MSAT  Sec Size: %s" % str(iSectorSizeMini))
-        print("    SAT Total Sec: %s" % str(iSAT_TotalSec))
-        print("    SAT  1st  Sec: %s" % str(iDir1stSec))
-        print("      Stream Size: %s" % str(iStreamSizeMini))
-        print("   MSAT  1st  Sec: %s" % str(iMSAT_1stSec))
-        print("   MSAT Total Sec: %s" % str(iMSAT_TotalSec))
-        print(" DirSAT  1st  Sec: %s" % str(iDISAT_1stSec))
-        print(" DirSAT Total Sec: %s" % str(iDISAT_TotalSec))
+        listLines.extend((
+            "    SAT  Sec Size: %s" % str(iSectorSize),
+            "   MSAT  Sec Size: %s" % str(iSectorSizeMini),
+            "    SAT Total Sec: %s" % str(iSAT_TotalSec),
+            "    SAT  1st  Sec: %s" % str(iDir1stSec),
+            "      Stream Size: %s" % str(iStreamSizeMini),
+            "   MSAT  1st  Sec: %s" % str(iMSAT_1stSec),
+            "   MSAT Total Sec: %s" % str(iMSAT_TotalSec),
+            " DirSAT  1st  Sec: %s" % str(iDISAT_1stSec),
+            " DirSAT Total Sec: %s" % str(iDISAT_TotalSec),
+        ))
+    listLines.append("")
+    sys.stdout.write("\n".join(listLines))
     return
 
 
 def printCache(strName, dictOLECache):
-    print("          Name: %s" % strName)
-    print("          Type: %d (%s)" % (dictOLECache["type"], config.OLE_BLOCK_TYPES[dictOLECache["type"]]))
+    # Print the entry as one write...
+    listLines = [
+        "          Name: %s" % strName,
+        "          Type: %d (%s)" % (dictOLECache["type"], config.OLE_BLOCK_TYPES[dictOLECache["type"]]),
+    ]
+    if (config.ARGS.verbose > 0):
+        listLines.extend((
+            "         Color: %d (%s)" % (dictOLECache["color"], "Black" if dictOLECache["color"] else "Red"),
+            "   Prev Dir ID: %s" % ("None" if (dictOLECache["PDID"] == config.OLE_NONE_BLOCK) else str(dictOLECache["PDID"])),
+            "   Next Dir ID: %s" % ("None" if (dictOLECache["NDID"] == config.OLE_NONE_BLOCK) else str(dictOLECache["NDID"])),
+            "   Sub  Dir ID: %s" % ("None" if (dictOLECache["SDID"] == config.OLE_NONE_BLOCK) else str(dictOLECache["SDID"])),
+            "      Class ID: " + dictOLECache["CID"],
+            "    User Flags: " + dictOLECache["userflags"],
+            "        Create: " + utils.getFormattedWinToPyTimeUTC(dictOLECache["create"]),
+            "        Modify: " + utils.getFormattedWinToPyTimeUTC(dictOLECache["modify"]),
+            "       1st Sec: %d" % dictOLECache["SID_firstSecDir"],
+            "          Size: %d" % dictOLECache["SID_sizeDir"],
+        ))
+    listLines.append("")
+    sys.stdout.write("\n".join(listLines))
     if (config.ARGS.verbose > 0):
-        print("         Color: %d (%s)" % (dictOLECache["color"], "Black" if dictOLECache["color"] else "Red"))
-        print("   Prev Dir ID: %s" % ("None" if (dictOLECache["PDID"] == config.OLE_NONE_BLOCK) else str(dictOLECache["PDID"])))
-        print("   Next Dir ID: %s" % ("None" if (dictOLECache["NDID"] == config.OLE_NONE_BLOCK) else str(dictOLECache["NDID"])))
-        print("   Sub  Dir ID: %s" % ("None" if (dictOLECache["SDID"] == config.OLE_NONE_BLOCK) else str(dictOLECache["SDID"])))
-        print("      Class ID: " + dictOLECache["CID"])
-        print("    User Flags: " + dictOLECache["userflags"])
-        print("        Create: " + utils.getFormattedWinToPyTimeUTC(dictOLECache["create"]))
-        print("        Modify: " + utils.getFormattedWinToPyTimeUTC(dictOLECache["modify"]))
-        print("       1st Sec: %d" % dictOLECache["SID_firstSecDir"])
-        print("          Size: %d" % dictOLECache["SID_sizeDir"])
         if (config.ARGS.edbfile != None):
             config.ESEDB.printInfo()
     return
 
 
-def process(infile, fileThumbsDB, iThumbsDBSize):
+def process(infile, mapThumbsDB, iThumbsDBSize):
+    # Process the OLE file...
+    #   Every view of the mapped file taken by the parse is kept in a list and released
+    #   when done, even on an error, so the caller can always close the mapping
+    listViews = []
+    try:
+        processViews(infile, mapThumbsDB, iThumbsDBSize, listViews)
+    finally:
+        for mvView in listViews:
+            mvView.release()
+    return
+
+
+def processViews(infile, mapThumbsDB, iThumbsDBSize, listViews):
     preparePILOutput()
     from PIL import Image, ImageChops
 
@@ -169,32 +280,35 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
 
     tDB_endian = "<"  # Little Endian
 
-    fileThumbsDB.seek(8)  # ...skip magic bytes                              # File Signature: 0xD0CF11E0A1B11AE1 for current version
-    tDB_CLSID             = str(hexlify( fileThumbsDB.read(16) ))[2:-1]      # CLSID
-    tDB_revisionNo        = unpack(tDB_endian+"H", fileThumbsDB.read(2))[0]  # Minor Version
-    tDB_versionNo         = unpack(tDB_endian+"H", fileThumbsDB.read(2))[0]  # Version
+    iOffset = 8  # ...skip magic bytes                                       # File Signature: 0xD0CF11E0A1B11AE1 for current version
+    (bstrCLSID,                                                              # CLSID
+     tDB_revisionNo,                                                         # Minor Version
+     tDB_versionNo,                                                          # Version
+     tDB_endianOrder) = OLE_HEAD_PREAMBLE.unpack_from(mapThumbsDB, iOffset)  # Byte Order, 0xFFFE (Intel)
+    iOffset += OLE_HEAD_PREAMBLE.size
+    tDB_CLSID = bstrCLSID.hex()
 
-    tDB_endianOrder       = fileThumbsDB.read(2)  # 0xFFFE OR 0xFEFF         # Byte Order, 0xFFFE (Intel)
-    if (tDB_endianOrder == bytearray(config.BIG_ENDIAN)):
+    if (tDB_endianOrder == config.BIG_ENDIAN):
         tDB_endian = ">"  # Big Endian
     # Otherwise, it's Little Endian:
-    #     (tDB_endianOrder == bytearray(config.LIL_ENDIAN))
+    #     (tDB_endianOrder == config.LIL_ENDIAN)
     # which was initialized above.
 
-    tDB_SectorSize         = unpack(tDB_endian+"H", fileThumbsDB.read(2))[0]  # Sector Shift
-    tDB_SectorSizeMini     = unpack(tDB_endian+"H", fileThumbsDB.read(2))[0]  # Mini Sector Shift
-    reserved01             = unpack(tDB_endian+"H", fileThumbsDB.read(2))[0]  # short int reserved
-    reserved02             = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # int reserved
-    reserved03             = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # Sector Count for Directory Chain (4 KB Sectors)
-    tDB_SID_SAT_TotalSec   = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # Sector Count for SAT Chain (512 B Sectors)
-    tDB_SID_SAT_FirstSec   = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # Root Directory: 1st Sector in Directory Chain
-    reserved04             = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # Signature for transactions (0, not implemented)
-    tDB_StreamSize         = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # Stream Max Size (typically 4 KB)
-    tDB_SID_MSAT_FirstSec  = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # First Sector in the MiniSAT chain
-    tDB_SID_MSAT_TotalSec  = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # Sector Count in the MiniSAT chain
-    tDB_SID_DISAT_FirstSec = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # First Sector in the DISAT chain
-    tDB_SID_DISAT_TotalSec = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # Sector Count in the DISAT chain
-    iOffset = 76
+    (tDB_SectorSize,          # Sector Shift
+     tDB_SectorSizeMini,      # Mini Sector Shift
+     reserved01,              # short int reserved
+     reserved02,              # int reserved
+     reserved03,              # Sector Count for Directory Chain (4 KB Sectors)
+     tDB_SID_SAT_TotalSec,    # Sector Count for SAT Chain (512 B Sectors)
+     tDB_SID_SAT_FirstSec,    # Root Directory: 1st Sector in Directory Chain
+     reserved04,              # Signature for transactions (0, not implemented)
+     tDB_StreamSize,          # Stream Max Size (typically 4 KB)
+     tDB_SID_MSAT_FirstSec,   # First Sector in the MiniSAT chain
+     tDB_SID_MSAT_TotalSec,   # Sector Count in the MiniSAT chain
+     tDB_SID_DISAT_FirstSec,  # First Sector in the DISAT chain
+     tDB_SID_DISAT_TotalSec,  # Sector Count in the DISAT chain
+    ) = OLE_HEAD[tDB_endian].unpack_from(mapThumbsDB, iOffset)
+    iOffset += OLE_HEAD[tDB_endian].size  # ...76
 
     if (config.ARGS.verbose >= 0):
         print(" Header\n --------------------")
@@ -204,28 +318,29 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
                      tDB_SID_DISAT_FirstSec, tDB_SID_DISAT_TotalSec)
         print(config.STR_SEP)
 
+    mvThumbsDB = memoryview(mapThumbsDB)  # ...zero-copy slices of the mapped file
+    listViews.append(mvThumbsDB)
+
     # Load Sector Allocation Table (SAT) list...
-    listSAT = []
-    for iCurrentSector in range(tDB_SID_SAT_TotalSec):
-        listSAT.append(unpack(tDB_endian+"L", fileThumbsDB.read(4))[0])
-        iOffset += 4
+    #   (a single read of all SAT Sector IDs following the header fields)
+    listSAT = [iSector for (iSector,) in
+               OLE_SECTOR_ID[tDB_endian].iter_unpack(mvThumbsDB[iOffset:iOffset + tDB_SID_SAT_TotalSec * 4])]
+
+    # Load the SAT next block table...
+    listSATTable = loadTable(mvThumbsDB, listSAT, tDB_endian)
 
     # Load Mini Sector Allocation Table (MiniSAT) list...
-    iCurrentSector = tDB_SID_MSAT_FirstSec
-    listMiniSAT = []
-    while (iCurrentSector != config.OLE_LAST_BLOCK):
-        listMiniSAT.append(iCurrentSector)
-        iCurrentSector = nextBlock(fileThumbsDB, listSAT, iCurrentSector, tDB_endian)
+    listMiniSAT = getChain(listSATTable, tDB_SID_MSAT_FirstSec)
+
+    # Load the MiniSAT next block table...
+    listMiniSATTable = loadTable(mvThumbsDB, listMiniSAT, tDB_endian)
 
     # Load Mini SAT Streams list...
     iCurrentSector = tDB_SID_SAT_FirstSec  # First Entry (Root)
     iOffset = 512 + iCurrentSector * 512   # First Entry Offset (to Root)
-    fileThumbsDB.seek(iOffset + 116)           # First Entry Offset + First Sec Offset (always Mini @ Root)
-    iStream = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]  # First Mini SAT Entry (usually Mini's Catalog or OLE_LAST_BLOCK)
-    listMiniSATStreams = []
-    while (iStream != config.OLE_LAST_BLOCK):
-        listMiniSATStreams.append(iStream)
-        iStream = nextBlock(fileThumbsDB, listSAT, iStream, tDB_endian)
+    # First Entry Offset + First Sec Offset (always Mini @ Root)...
+    iStream = OLE_SECTOR_ID[tDB_endian].unpack_from(mapThumbsDB, iOffset + 116)[0]  # First Mini SAT Entry (usually Mini's Catalog or OLE_LAST_BLOCK)
+    listMiniSATStreams = getChain(listSATTable, iStream)
 
     # =============================================================
     # Process Entries...
@@ -234,52 +349,68 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
     tdbStreams = tdb_streams.TDB_Streams()
     tdbCatalog = tdb_catalog.TDB_Catalog()
 
+    structDirEntry = OLE_DIR_ENTRY[tDB_endian]
+    structUShort = OLE_USHORT[tDB_endian]
+    structULong = OLE_ULONG[tDB_endian]
+
+    # Set the output path prefixes once for the entries...
+    strOutDir = config.ARGS.outdir
+    strThumbsPrefix = config.THUMBS_SUBDIR + "/"
+
+    # Bind the run's settings once for the entry loops...
+    iVerbose = config.ARGS.verbose
+    bSymlinks = config.ARGS.symlinks
+    bHTMLReport = config.ARGS.htmlrep
+    strSep = config.STR_SEP
+    decodeBytes = utils.decodeBytes
+
     iStreamCounter = 1
-    while (iCurrentSector != config.OLE_LAST_BLOCK):
+    for iCurrentSector in getChain(listSATTable, iCurrentSector):
         iOffset = 512 + iCurrentSector * 512
         for i in range(iOffset, iOffset + 512, 128):  # 4 Entries per Block: 128 * 4 = 512
-            fileThumbsDB.seek(i)
             dictOLECache = {}
-            dictOLECache["nameDir"]         = fileThumbsDB.read(64)
-            dictOLECache["nameDirSize"]     = unpack(tDB_endian+"H", fileThumbsDB.read(2))[0]
-            dictOLECache["type"]            = unpack("B",            fileThumbsDB.read(1))[0]
-            dictOLECache["color"]           = unpack("?",            fileThumbsDB.read(1))[0]
-            dictOLECache["PDID"]            = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]
-            dictOLECache["NDID"]            = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]
-            dictOLECache["SDID"]            = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]
-            dictOLECache["CID"]             = str(hexlify( fileThumbsDB.read(16) ))[2:-1]
-            dictOLECache["userflags"]       = str(hexlify( fileThumbsDB.read( 4) ))[2:-1]
-            dictOLECache["create"]          = unpack(tDB_endian+"Q", fileThumbsDB.read(8))[0]
-            dictOLECache["modify"]          = unpack(tDB_endian+"Q", fileThumbsDB.read(8))[0]
-            dictOLECache["SID_firstSecDir"] = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]
-            dictOLECache["SID_sizeDir"]     = unpack(tDB_endian+"L", fileThumbsDB.read(4))[0]
+            (dictOLECache["nameDir"],
+             dictOLECache["nameDirSize"],
+             dictOLECache["type"],
+             dictOLECache["color"],
+             dictOLECache["PDID"],
+             dictOLECache["NDID"],
+             dictOLECache["SDID"],
+             bstrCID,
+             bstrUserFlags,
+             dictOLECache["create"],
+             dictOLECache["modify"],
+             dictOLECache["SID_firstSecDir"],
+             dictOLECache["SID_sizeDir"]) = structDirEntry.unpack_from(mapThumbsDB, i)
+            dictOLECache["CID"]             = bstrCID.hex()
+            dictOLECache["userflags"]       = bstrUserFlags.hex()
 
             # Convert encoded bytes to unicode string:
-            #   a unicode string length is half the bytes length minus 1 (terminal null)
-            strRawName = utils.decodeBytes(dictOLECache["nameDir"])[0:(dictOLECache["nameDirSize"] // 2 - 1)]
+            #   only the name's bytes are decoded, i.e., the bytes length minus 2 (terminal null)
+            strRawName = decodeBytes(dictOLECache["nameDir"][0:max(dictOLECache["nameDirSize"] // 2 - 1, 0) * 2])
 
             # Empty Entry processing...
             # =============================================================
             if (dictOLECache["type"] == 0):
-                if (config.ARGS.verbose >= 0):
+                if (iVerbose >= 0):
                     print(" Empty Entry %d\n --------------------" % iStreamCounter)
                     printCache(strRawName, dictOLECache)
-                    print(config.STR_SEP)
+                    print(strSep)
 
             # Storage Entry processing...
             # =============================================================
             elif (dictOLECache["type"] == 1):
-                if (config.ARGS.verbose >= 0):
+                if (iVerbose >= 0):
                     print(" Storage Entry %d\n --------------------" % iStreamCounter)
                     printCache(strRawName, dictOLECache)
-                    print(config.STR_SEP)
+                    print(strSep)
 
             # Stream Entry processing...
             # =============================================================
             elif (dictOLECache["type"] == 2):
                 bRegularBlock = (dictOLECache["SID_sizeDir"] >= 4096)
 
-                if (config.ARGS.verbose >= 0):
+                if (iVerbose >= 0):
                     print((" Stream Entry %d (" % iStreamCounter) +
                           ("Standard" if bRegularBlock else "Mini") + ")\n" +
                           " --------------------")
@@ -302,23 +433,25 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
                     bOldNameID = True  # ...older name convention
                     keyStreamName = iStreamID  # Set older Stream Name key
 
-                # Set entry's first stream sector...
-                iCurrentStreamSector = dictOLECache["SID_firstSecDir"]
                 # Set entry's read data size...
                 iBytesToRead = dictOLECache["SID_sizeDir"]
                 # Set entry's read storage...
-                bstrStreamData = bytearray(b"")
+                #   Holds views of the stream's sectors in the mapped file.  The data is only
+                #   copied by getStreamData() where it is needed as a whole (Catalog, Type 1).
+                #   Sectors that follow each other in the file are coalesced into one view.
+                listStreamData = []
+                iRunStart = iRunEnd = 0
 
                 # Set entry's regular SAT read support values...
                 iReadSize = 512
-                listOfNext = listSAT
+                listOfNext = listSATTable
                 if (not bRegularBlock):  # ...stream located in the MiniSAT...
                     # Set entry's MiniSAT read support values...
                     iReadSize = 64
-                    listOfNext = listMiniSAT
+                    listOfNext = listMiniSATTable
 
                 # Read data from stream sectors...
-                while (iCurrentStreamSector != config.OLE_LAST_BLOCK):
+                for iCurrentStreamSector in getChain(listOfNext, dictOLECache["SID_firstSecDir"]):
                     # Get stream offset...
                     if (bRegularBlock):  # ...stream located in the SAT...
                             iStreamOffset = 512 + iCurrentStreamSector * 512
@@ -333,64 +466,66 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
 
                             iStreamOffset = 512 + iSectorMini * 512 + iOffsetMini
 
-                    # Set read location...
-                    fileThumbsDB.seek(iStreamOffset)
-
                     # Read data...
-                    if (iBytesToRead >= iReadSize):
-                        bstrStreamData = bstrStreamData + fileThumbsDB.read(iReadSize)
-                    else:
-                        bstrStreamData = bstrStreamData + fileThumbsDB.read(iBytesToRead)
+                    if (iBytesToRead > 0):
+                        if (iStreamOffset != iRunEnd):  # ...not contiguous with the current run...
+                            if (iRunEnd > iRunStart):
+                                listStreamData.append(mvThumbsDB[iRunStart:iRunEnd])
+                                listViews.append(listStreamData[-1])
+                            iRunStart = iStreamOffset
+                        iRunEnd = iStreamOffset + min(iReadSize, iBytesToRead)
                     iBytesToRead = iBytesToRead - iReadSize
+                if (iRunEnd > iRunStart):
+                    listStreamData.append(mvThumbsDB[iRunStart:iRunEnd])
+                    listViews.append(listStreamData[-1])
 
-                    # Get entry's next stream sector...
-                    iCurrentStreamSector = nextBlock(fileThumbsDB, listOfNext, iCurrentStreamSector, tDB_endian)
-
-                iStreamDataLen = len(bstrStreamData)
+                iStreamDataLen = sum(len(mvSector) for mvSector in listStreamData)
 
                 # Catalog Stream processing...
                 # -------------------------------------------------------------
                 #  Catalogs are related to the older Thumbs DB index name convention
                 if (strRawName == "Catalog"):
-                    if (config.ARGS.verbose >= 0):
+                    if (iVerbose >= 0):
                         print("       Entries: ---------------------------------------")
 
+                    bstrStreamData = getStreamData(listStreamData, 0, iStreamDataLen)
+
                     # Get catalog header...
-                    iCatOffset      = unpack(tDB_endian+"H", bstrStreamData[ 0: 2])[0]
-                    iCatVersion     = unpack(tDB_endian+"H", bstrStreamData[ 2: 4])[0]
-                    iCatThumbCount  = unpack(tDB_endian+"L", bstrStreamData[ 4: 8])[0]
-                    iCatThumbWidth  = unpack(tDB_endian+"L", bstrStreamData[ 8:12])[0]
-                    iCatThumbHeight = unpack(tDB_endian+"L", bstrStreamData[12:16])[0]
+                    (iCatOffset,
+                     iCatVersion,
+                     iCatThumbCount,
+                     iCatThumbWidth,
+                     iCatThumbHeight) = OLE_CATALOG_HEAD[tDB_endian].unpack_from(bstrStreamData, 0)
 
                     # Process catalog entries...
                     #  Each catalog entry has an index name, timestamp, and original file name
+                    structCatEntry = OLE_CATALOG_ENTRY[tDB_endian]
+                    mvStreamData = memoryview(bstrStreamData)
                     while (iCatOffset < iStreamDataLen):
                         # Preamble...
-                        iCatEntryLen       = unpack(tDB_endian+"L", bstrStreamData[iCatOffset      :iCatOffset +  4])[0]
-                        iCatEntryID        = unpack(tDB_endian+"L", bstrStreamData[iCatOffset +  4 :iCatOffset +  8])[0]
-                        iCatEntryTimestamp = unpack(tDB_endian+"Q", bstrStreamData[iCatOffset +  8 :iCatOffset + 16])[0]
+                        (iCatEntryLen,
+                         iCatEntryID,
+                         iCatEntryTimestamp) = structCatEntry.unpack_from(bstrStreamData, iCatOffset)
                         # The Catalog Entry Name:
                         # 1. starts after the preamable (16)
                         # 2. end with 4 null bytes (4)
                         # Therefore, the start of the name string is at the end of the preamble
                         #   and the end of the name string is at the end of the entry minus 4
-                        bstrCatEntryName   =                        bstrStreamData[iCatOffset + 16: iCatOffset + iCatEntryLen - 4]
+                        mvCatEntryName     = mvStreamData[iCatOffset + 16: iCatOffset + iCatEntryLen - 4]
 
                         strCatEntryID        = "%d" % (iCatEntryID)
                         strCatEntryTimestamp = utils.getFormattedWinToPyTimeUTC(iCatEntryTimestamp)
-                        strCatEntryName      = utils.decodeBytes(bstrCatEntryName)
-                        if (config.ARGS.symlinks):  # ...implies config.ARGS.outdir
-                            strTarget = config.THUMBS_SUBDIR + "/" + strCatEntryID + ".jpg"
-                            utils.setSymlink(strTarget, config.ARGS.outdir + strCatEntryName)
+                        strCatEntryName      = decodeBytes(mvCatEntryName)
+                        if (bSymlinks):  # ...implies config.ARGS.outdir
+                            strTarget = strThumbsPrefix + strCatEntryID + ".jpg"
+                            utils.setSymlink(strTarget, strOutDir + strCatEntryName)
 
-                            fileURL = open(config.ARGS.outdir + config.THUMBS_FILE_SYMS, "a+")
-                            fileURL.write(strTarget + " => " + strCatEntryName + "\n")
-                            fileURL.close()
+                            utils.addSymlinkLog(strTarget, strCatEntryName)
 
                         # Add a "catalog" entry...
                         tdbCatalog[iCatEntryID] = (strCatEntryTimestamp, strCatEntryName)
 
-                        if (config.ARGS.verbose >= 0):
+                        if (iVerbose >= 0):
                             print("          " + ("% 4s" % strCatEntryID) + ":  " + ("%19s" % strCatEntryTimestamp) + "  " + strCatEntryName)
 
                         # Next catalog entry...
@@ -400,15 +535,16 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
                 # -------------------------------------------------------------
                 else:
                     # Is End Of Image (EOI) at end of stream?
-                    if (bstrStreamData[iStreamDataLen - 2: iStreamDataLen] != bytearray(config.JPEG_EOI)):  # ...Not End Of Image (EOI)
+                    if (not getStreamData(listStreamData, iStreamDataLen - 2, iStreamDataLen).endswith(config.JPEG_EOI)):  # ...Not End Of Image (EOI)
                         raise verror.EntryError(" Error (Entry): Missing End of Image (EOI) marker in stream entry " + str(iStreamCounter))
 
                     # --- Header 1: Get file offset...
-                    headOffset   = unpack(tDB_endian+"L", bstrStreamData[ 0: 4])[0]
-                    headRevision = unpack(tDB_endian+"L", bstrStreamData[ 4: 8])[0]
+                    (headOffset,
+                     headRevision,
+                     headLength) = OLE_STREAM_HEAD[tDB_endian].unpack_from(getStreamData(listStreamData, 0, 10), 0)
 
                     # Is length OK?
-                    if (unpack(tDB_endian+"H", bstrStreamData[ 8:10])[0] != (iStreamDataLen - headOffset)):
+                    if (headLength != (iStreamDataLen - headOffset)):
                         raise verror.EntryError(" Error (Entry): Header 1 length mismatch in stream entry " + str(iStreamCounter))
 
                     strExt = "jpg"
@@ -423,29 +559,29 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
                                     strFileName = config.ESEDB.dictRecord["IURL"].split("/")[-1].split("?")[0]
 
                         if (strFileName != None):
-                            if (config.ARGS.symlinks):  # ...implies config.ARGS.outdir
-                                strTarget = config.ARGS.outdir + config.THUMBS_SUBDIR + "/" + strRawName + "." + strExt
-                                utils.setSymlink(strTarget, config.ARGS.outdir + strFileName)
+                            if (bSymlinks):  # ...implies config.ARGS.outdir
+                                strTarget = strThumbsPrefix + strRawName + "." + strExt
+                                utils.setSymlink(strTarget, strOutDir + strFileName)
 
-                                fileURL = open(config.ARGS.outdir + config.THUMBS_FILE_SYMS, "a+")
-                                fileURL.write(strTarget + " => " + strFileName + "\n")
-                                fileURL.close()
+                                utils.addSymlinkLog(strTarget, strFileName)
 
                             # Add a "catalog" entry...
                             tdbCatalog[strRawName] = (strCatEntryTimestamp, strFileName)
 
-                            if (config.ARGS.verbose >= 0):
+                            if (iVerbose >= 0):
                                 print("  CATALOG " + strRawName + ":  " + ("%19s" % strCatEntryTimestamp) + "  " + strFileName)
 
                     # --- Header 2: Type 2 Thumbnail Image? (Full JPEG)...
-                    if (bstrStreamData[headOffset: headOffset + 4] == bytearray(config.JPEG_SOI + config.JPEG_APP0)):
-                        if (config.ARGS.outdir != None):
+                    bstrImageHead = getStreamData(listStreamData, headOffset, headOffset + 6)
+                    if (bstrImageHead.startswith(config.JPEG_SOI + config.JPEG_APP0)):
+                        if (strOutDir != None):
                             strFileName = tdbStreams.getFileName(keyStreamName, strExt)
-                            fileImg = open(config.ARGS.outdir + strFileName, "wb")
-                            fileImg.write(bstrStreamData[headOffset:])
-                            fileImg.close()
+                            # Write the image from the stream's sector views (not copied)...
+                            listImageData = list(iterStreamData(listStreamData, headOffset, iStreamDataLen))
+                            listViews.extend(listImageData)
+                            utils.writeDataFile(strOutDir + strFileName, listImageData)
 
-                            if (config.ARGS.verbose > 0):
+                            if (iVerbose > 0):
                                 print("     File Info: ---------------------------------------")
                                 print("          Type: 2 (Full JPEG)")
                                 print("          Name: %s" % strFileName)
@@ -454,13 +590,14 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
                             tdbStreams[keyStreamName] = config.LIST_PLACEHOLDER
 
                     # --- Header 2: Type 1 Thumbnail Image? (JPEG Frame)...
-                    elif (unpack(tDB_endian+"L", bstrStreamData[headOffset: headOffset + 4])[0] == 1):
+                    elif (structULong.unpack_from(bstrImageHead, 0)[0] == 1):
                         # Is second header OK?
-                        if (unpack(tDB_endian+"H", bstrStreamData[headOffset + 4: headOffset + 6])[0] != (iStreamDataLen - headOffset - 16)):
+                        if (structUShort.unpack_from(bstrImageHead, 4)[0] != (iStreamDataLen - headOffset - 16)):
                             raise verror.EntryError(" Error (Entry): Header 2 length mismatch in stream entry " + str(iStreamCounter))
 
-                        if (config.ARGS.outdir != None and config.THUMBS_TYPE_OLE_PIL):
+                        if (strOutDir != None and config.THUMBS_TYPE_OLE_PIL):
                             strFileName = tdbStreams.getFileName(keyStreamName, strExt)
+                            bstrStreamData = getStreamData(listStreamData, 0, iStreamDataLen)
                             # DEBUG
                             #imageRaw = open(config.ARGS.outdir + strFileName + ".bin", "wb")
                             #imageRaw.write(bstrStreamData)
@@ -521,21 +658,19 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
                             #   3. The K aray is inverted (255 - value) MOSTLY
                             #
 
-                            iFileSize1 = int.from_bytes(bstrStreamData[ 8:12], 'little')
-                            iFileSize2 = int.from_bytes(bstrStreamData[16:20], 'little')
+                            iFileSize1 = OLE_ULONG["<"].unpack_from(bstrStreamData,  8)[0]
+                            iFileSize2 = OLE_ULONG["<"].unpack_from(bstrStreamData, 16)[0]
                             iFileDiff = iFileSize1 - iFileSize2
-                            iSIIndex = 0
-                            while True:
-                                if (bstrStreamData[iSIIndex : iSIIndex + 2] == bytearray(config.JPEG_SOI)):
-                                    break
-                                iSIIndex = iSIIndex + 1
+                            iSIIndex = bstrStreamData.find(config.JPEG_SOI)
+                            if (iSIIndex < 0):
+                                raise verror.EntryError(" Error (Entry): Missing Start of Image (SOI) marker in stream entry " + str(iStreamCounter))
                             iImageIndex = iSIIndex # Start of Image
                             iFrameIndex = iImageIndex + 2 # Start of Frame
-                            iFrameSize = int.from_bytes(bstrStreamData[32:34], 'big')
-                            iFramePrec = int(bstrStreamData[34])
-                            iFrameLCnt = int.from_bytes(bstrStreamData[35:37], 'big')
-                            iFrameSPL  = int.from_bytes(bstrStreamData[37:39], 'big')
-                            iFrameCCnt = int(bstrStreamData[39])
+                            (iFrameSize,
+                             iFramePrec,
+                             iFrameLCnt,
+                             iFrameSPL,
+                             iFrameCCnt) = OLE_TYPE1_FRAME.unpack_from(bstrStreamData, 32)
                             iFrameCompID = [0 for i in range(iFrameCCnt)]
                             iFrameCompHF = [0 for i in range(iFrameCCnt)]
                             iFrameCompVF = [0 for i in range(iFrameCCnt)]
@@ -549,12 +684,13 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
 
                             iScanIndex = iFrameIndex + 2 + iFrameSize # Start Of Scan
 
-                            bstrImage = (
-                                config.THUMBS_TYPE_OLE_PIL_TYPE1_HEADER[:20] + # Generic JPEG Header
-                                config.THUMBS_TYPE_OLE_PIL_TYPE1_QUANTIZE +    # Generic JPEG Quantization Table
-                                bstrStreamData[iFrameIndex:iScanIndex] +       # Frame Info
-                                config.THUMBS_TYPE_OLE_PIL_TYPE1_HUFFMAN  +    # Generic JPEG Huffman Tables
-                                bstrStreamData[iScanIndex:] )                  # Image Info
+                            # Build the image in one copy from views of the stream data...
+                            mvStreamData = memoryview(bstrStreamData)
+                            bstrImage = b"".join((
+                                config.THUMBS_TYPE_OLE_PIL_TYPE1_PREFIX,       # Generic JPEG Header and Quantization Table
+                                mvStreamData[iFrameIndex:iScanIndex],          # Frame Info
+                                config.THUMBS_TYPE_OLE_PIL_TYPE1_HUFFMAN,      # Generic JPEG Huffman Tables
+                                mvStreamData[iScanIndex:] ))                   # Image Info
 
                             imageIn = Image.open( BytesIO( bstrImage ), 'r', ["JPEG"] )
 
@@ -569,22 +705,22 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
                             #                               Y--------  Cb-------  Cr------
                             imageOut = Image.merge("CMYK", (outChannelC, outChannelM, outChannelY, outChannelK))
                             imageOut = imageOut.transpose(Image.FLIP_TOP_BOTTOM)
-                            imageOut.save(config.ARGS.outdir + strFileName, "JPEG", quality=100)
+                            imageOut.save(strOutDir + strFileName, "JPEG", quality=100)
                             #imageOut2 = Image.merge("YCbCr", (channelY, channelCb, channelCr))
                             #imageOut2 = imageOut2.transpose(Image.FLIP_TOP_BOTTOM)
                             #imageOut2.save(config.ARGS.outdir + strFileName + "_2", "JPEG", quality=100)
 
-                            if (config.ARGS.verbose > 0):
+                            if (iVerbose > 0):
                                 print("     File Info: ---------------------------------------")
                                 print("          Type: 1 (JPEG Fragment)")
                                 print("          Name: %s" % strFileName)
-                                if (config.ARGS.verbose > 1):
+                                if (iVerbose > 1):
                                     print("        Size 1: %d Bytes" % iFileSize1)
                                     print("        Size 2: %d Bytes" % iFileSize2)
                                     print(" 16 Byte Diff?: %d Bytes, %s" % (iFileDiff, (iFileDiff == 16)))
                                     print("Start of Image: Byte# %d" % iImageIndex)
                                     print("Start of Frame: Byte# %d" % iFrameIndex)
-                                    if (config.ARGS.verbose > 2):
+                                    if (iVerbose > 2):
                                         print("         Frame: --------------------")
                                         print("              :        Size: %d" % iFrameSize)
                                         print("              :   Precision: %d" % iFramePrec)
@@ -604,41 +740,39 @@ def process(infile, fileThumbsDB, iThumbsDBSize):
                     else:
                         raise verror.EntryError(" Error (Entry): Header 2 not found in stream entry " + str(iStreamCounter))
 
-                if (config.ARGS.verbose >= 0):
-                    print(config.STR_SEP)
+                if (iVerbose >= 0):
+                    print(strSep)
 
             # Lock Bytes Entry processing...
             # =============================================================
             elif (dictOLECache["type"] == 3):
-                if (config.ARGS.verbose >= 0):
+                if (iVerbose >= 0):
                     print(" Lock Bytes Entry %d\n --------------------" % iStreamCounter)
                     printCache(strRawName, dictOLECache)
-                    print(config.STR_SEP)
+                    print(strSep)
 
             # Property Entry processing...
             # =============================================================
             elif (dictOLECache["type"] == 4):
-                if (config.ARGS.verbose >= 0):
+                if (iVerbose >= 0):
                     print(" Property Entry %d\n --------------------" % iStreamCounter)
                     printCache(strRawName, dictOLECache)
-                    print(config.STR_SEP)
+                    print(strSep)
 
             # Root Entry processing...
             # =============================================================
             elif (dictOLECache["type"] == 5):  # ...ROOT should always be first entry
-                if (config.ARGS.verbose >= 0):
+                if (iVerbose >= 0):
                     print(" Root Entry %d\n --------------------" % iStreamCounter)
                     printCache(strRawName, dictOLECache)
-                    print(config.STR_SEP)
+                    print(strSep)
 
-                if (config.ARGS.htmlrep):  # ...implies config.ARGS.outdir
+                if (bHTMLReport):  # ...implies config.ARGS.outdir
                     # Set the OLE Head for the HTTP report using the Root Entry info...
                     config.HTTP_REPORT.setOLE(dictOLECache)
 
             iStreamCounter += 1
 
-        iCurrentSector = nextBlock(fileThumbsDB, listSAT, iCurrentSector, tDB_endian)
-
     # Process end of file...
     # -----------------------------------------------------------------
     if (config.ARGS.verbose > 0):
@@ -36,6 +36,8 @@ from sys import version_info as py_version_info
 import os
 import errno
 from time import strftime, gmtime
+from functools import lru_cache
+from codecs import getdecoder
 
 try:
     import vinetto.config as config
@@ -60,7 +62,9 @@ def getFormattedTimeUTC(iTime):
     return strTime
 
 
+@lru_cache(maxsize=1024)
 def getFormattedWinToPyTimeUTC(iFileTime_Win32):
+    # Thumbnail entries commonly share timestamps, so recent results are cached...
     if (iFileTime_Win32 == None):
         return "None"
     return getFormattedTimeUTC( convertWinToPyTime(iFileTime_Win32) )
@@ -86,9 +90,34 @@ def getEncoding():
 #    return str(bytesString, "utf-16-le").encode(getEncoding(), "replace")
 
 
+# The utf-16-le decoder, bound once: calling it directly skips the codec lookup by name
+UTF16LE_DECODE = getdecoder("utf-16-le")
+
 def decodeBytes(byteString):
     # Convert bytes encoded as utf-16-le to standard unicode...
-    return str(byteString, "utf-16-le")
+    return UTF16LE_DECODE(byteString)[0]
+
+
+def writeDataFile(strFileName, iterData):
+    # Write the in-memory data buffers, in order, to a new file...
+    #   The file is unbuffered since each buffer is written whole: a buffered writer would
+    #   only add its own buffer and copy.  The buffers may be views (e.g., of a mapped
+    #   file's sectors), so the data is never joined.  The views taken here are released
+    #   as soon as each buffer is written, even on an error.
+    with open(strFileName, "wb", buffering=0) as fileData:
+        for bstrData in iterData:
+            with memoryview(bstrData) as mvData:
+                iWritten = fileData.write(mvData)
+                while (iWritten < len(mvData)):
+                    with mvData[iWritten:] as mvRest:
+                        iWritten += fileData.write(mvRest)
+
+
+def getDataFileName(strName):
+    # Return the path of a data file installed with Vinetto (see setup.py package_data)...
+    #   The data directory sits next to this module, so the path is built directly rather
+    #   than through pkg_resources (which is slow to import)
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", strName)
 
 
 def prepareSymLink():
@@ -96,11 +125,14 @@ def prepareSymLink():
         return
 
     strSymOut = config.ARGS.outdir + config.THUMBS_SUBDIR
-    if not os.path.exists(strSymOut):
-        try:
-            os.mkdir(strSymOut)
-        except EnvironmentError:
+    # Create the directory directly instead of probing it first...
+    try:
+        os.mkdir(strSymOut)
+    except FileExistsError:
+        if (not os.path.isdir(strSymOut)):
             raise verror.LinkError(" Error (Symlink): Cannot create directory " + strSymOut)
+    except EnvironmentError:
+        raise verror.LinkError(" Error (Symlink): Cannot create directory " + strSymOut)
     return
 
 
@@ -109,8 +141,51 @@ def setSymlink(strTarget, strLink):
         os.symlink(strTarget, strLink)
     except OSError as e:
         if e.errno == errno.EEXIST:
-            os.remove(strLink)
-            os.symlink(strTarget, strLink)
+            # Replace the existing link with a new link in one rename...
+            #   The link is never missing, unlike a remove then symlink
+            strLinkTemp = "%s.tmp.%d" % (strLink, os.getpid())
+            try:
+                try:
+                    os.symlink(strTarget, strLinkTemp)
+                except FileExistsError:  # ...stale temp link from an earlier run, replace it
+                    os.remove(strLinkTemp)
+                    os.symlink(strTarget, strLinkTemp)
+                os.replace(strLinkTemp, strLink)
+            except OSError:
+                # Do not leave the temp link behind...
+                try:
+                    os.remove(strLinkTemp)
+                except OSError:
+                    pass
+                raise verror.LinkError(" Error (Symlink): Cannot create symlink " + strLink + " to file " + strTarget)
         else:
             raise verror.LinkError(" Error (Symlink): Cannot create symlink " + strLink + " to file " + strTarget)
     return
+
+
+def addSymlinkLog(strTarget, strFileName):
+    # Buffer a symlink log line until the current Thumbnail file is done...
+    config.LIST_SYMLINKS.append(strTarget + " => " + strFileName + "\n")
+    return
+
+
+def writeSymlinkLog():
+    # Append the buffered symlink log lines to the symlink log in one write...
+    #   The log is opened on first use and kept open for the run.  It is flushed for each
+    #   Thumbnail file.  Only the main process writes the log: the parallel job processes
+    #   return their lines to it to be written in the files' order.
+    if (config.LIST_SYMLINKS):
+        if (config.FILE_SYMLINKS == None):
+            config.FILE_SYMLINKS = open(config.ARGS.outdir + config.THUMBS_FILE_SYMS, "a")
+        config.FILE_SYMLINKS.write("".join(config.LIST_SYMLINKS))
+        config.FILE_SYMLINKS.flush()
+        config.LIST_SYMLINKS.clear()
+    return
+
+
+def closeSymlinkLog():
+    # Close the symlink log, if opened...
+    if (config.FILE_SYMLINKS != None):
+        config.FILE_SYMLINKS.close()
+        config.FILE_SYMLINKS = None
+    return
@@ -35,6 +35,7 @@ file_micro = "13"
 
 import sys
 import os
+import stat
 import fnmatch
 import argparse
 import signal
@@ -113,6 +114,13 @@ def getArgs():
                               "NOTE: Automatic mode will attempt to use ESEDB without -e"))
     parser.add_argument("-H", "--htmlrep", action="store_true", dest="htmlrep",
                         help=("write html report to DIR (requires option -o)"))
+    parser.add_argument("-j", "--jobs", type=int, dest="jobs", metavar="JOBS", default=1,
+                        help=("process up to JOBS thumbnail files in parallel for the \"d\", \"r\",\n" +
+                              "and \"a\" modes (default 1), where 0 uses one job per CPU\n" +
+                              "NOTE: File output is reported in the order the files are found\n" +
+                              "NOTE: An error stops the run as with 1 job, but the files already\n" +
+                              "      running are finished (not reported)\n" +
+                              "NOTE: Each job process reports its own PIL import (see -v)"))
     parser.add_argument("-m", "--mode", nargs="?", dest="mode", choices=["f", "d", "r", "a"],
                         default="f", const="f",
                         help=("operating mode: \"f\", \"d\", \"r\", or \"a\"\n" +
@@ -174,6 +182,11 @@ def getArgs():
     if (pargs.mode == None):
       parser.error("Operating mode must be specified")
 
+    if (pargs.jobs < 0):
+        parser.error("-j option requires a job count of 0 or more")
+    if (pargs.jobs == 0):
+        pargs.jobs = os.cpu_count() or 1
+
     return (pargs)
 
 
@@ -183,18 +196,27 @@ def getArgs():
 #
 # ================================================================================
 
+def getPathMode(strPath):
+    # Return the path's mode from a single stat call, or None if it does not exist...
+    try:
+        return os.stat(strPath).st_mode
+    except (OSError, ValueError):
+        return None
+
+
 def testInput():
     strError = " Error (Input): "
 
     # Test Input File parameter...
     if (config.ARGS.infile != None):
-        if not os.path.exists(config.ARGS.infile):  # ...NOT exists?
+        iMode = getPathMode(config.ARGS.infile)
+        if (iMode == None):  # ...NOT exists?
             raise verror.InputError(strError + config.ARGS.infile + " does not exist")
         if (config.ARGS.mode == "f"):  # Traditional Mode...
-            if not os.path.isfile(config.ARGS.infile):  # ...NOT a file?
+            if not stat.S_ISREG(iMode):  # ...NOT a file?
                 raise verror.InputError(strError + config.ARGS.infile + " not a file")
         else:  # Directory, Recursive Directory, or Automatic Mode...
-            if not os.path.isdir(config.ARGS.infile):  # ...NOT a directory?
+            if not stat.S_ISDIR(iMode):  # ...NOT a directory?
                 raise verror.InputError(strError + config.ARGS.infile + " not a directory")
             # Add ending '/' as needed...
             if not config.ARGS.infile.endswith('/'):
@@ -210,7 +232,8 @@ def testOutput():
 
     # Test Output Directory parameter...
     if (config.ARGS.outdir != None):
-        if not os.path.exists(config.ARGS.outdir):  # ...NOT exists?
+        iMode = getPathMode(config.ARGS.outdir)
+        if (iMode == None):  # ...NOT exists?
             try:
                 os.mkdir(config.ARGS.outdir)  # ...make it
                 if (config.ARGS.verbose > 0):
@@ -218,7 +241,7 @@ def testOutput():
             except EnvironmentError as e:
                 raise verror.OutputError(strError + "Cannot create " + config.ARGS.outdir)
         else:  # ...exists...
-            if not os.path.isdir(config.ARGS.outdir):  # ...NOT a directory?
+            if not stat.S_ISDIR(iMode):  # ...NOT a directory?
                 raise verror.OutputError(strError + config.ARGS.outdir + " is not a directory")
             elif not os.access(config.ARGS.outdir, os.W_OK):  # ...NOT writable?
                 raise verror.OutputError(strError + config.ARGS.outdir + " not writable")
@@ -227,18 +250,21 @@ def testOutput():
             config.ARGS.outdir += "/"
 
         # Remove existing URL file...
-        if os.path.exists(config.ARGS.outdir + config.THUMBS_FILE_SYMS):
+        try:
             os.remove(config.ARGS.outdir + config.THUMBS_FILE_SYMS)
+        except FileNotFoundError:
+            pass
     return
 
 
-def getESEDB():
+def testESEDB():
     strType = " (ESEDB): "
 
     # Setup ESEDB File test...
     bEDBErrorOut = True
     strReport = " Error"
     strEDBFileReport = "Given ESEDB ("
+    iMode = None
     if (config.ARGS.mode == "a" and config.ARGS.edbfile == None):
         bEDBErrorOut = False
         strReport = " Warning"
@@ -247,28 +273,33 @@ def getESEDB():
         strEDBFile = os.path.join(config.ARGS.infile, config.OS_WIN_ESEDB_VISTA +
                                                       config.OS_WIN_ESEBD_COMMON +
                                                       config.OS_WIN_ESEBD_FILE)
-        if not os.path.exists(strEDBFile):  # ...NOT exists?
+        iMode = getPathMode(strEDBFile)
+        if (iMode == None):  # ...NOT exists?
             # Fallback to XP (older ESEDB location)...
             strEDBFile = os.path.join(config.ARGS.infile, config.OS_WIN_USERS_XP +
                                                           config.OS_WIN_ESEDB_XP +
                                                           config.OS_WIN_ESEBD_COMMON +
                                                           config.OS_WIN_ESEBD_FILE)
-            if not os.path.exists(strEDBFile):  # ...NOT exists?
+            iMode = getPathMode(strEDBFile)
+            if (iMode == None):  # ...NOT exists?
                 # Nothing available...
                 strEDBFile = None
         config.ARGS.edbfile = strEDBFile
 
     if (config.ARGS.edbfile == None):
-        return False
+        return
 
     strEDBFileReport += config.ARGS.edbfile + ")"
 
     # Test ESEDB File parameter...
+    #   A found default ESEDB was already stat'ed above
     bProblem = False
-    if not os.path.exists(config.ARGS.edbfile):  # ...NOT exists?
+    if (iMode == None):
+        iMode = getPathMode(config.ARGS.edbfile)
+    if (iMode == None):  # ...NOT exists?
         bProblem = True
         strErrorMsg = strReport + strType + strEDBFileReport + " does not exist"
-    elif not os.path.isfile(config.ARGS.edbfile):  # ...NOT a file?
+    elif not stat.S_ISREG(iMode):  # ...NOT a file?
         bProblem = True
         strErrorMsg = strReport + strType + strEDBFileReport + " is not a file"
     elif not os.access(config.ARGS.edbfile, os.R_OK):  # ...NOT readable?
@@ -280,6 +311,12 @@ def getESEDB():
             raise verror.ESEDBError(strErrorMsg)
         elif (config.ARGS.verbose >= 0):
             sys.stderr.write(strErrorMsg + "\n")
+    return
+
+
+def getESEDB():
+    if (config.ARGS.edbfile == None):
+        return False
 
     # ESEDB: Process data...
     config.ESEDB = esedb.ESEDB()
@@ -316,10 +353,6 @@ def main():
     config.ARGS = getArgs()
 
     try:
-        testInput()
-
-        testOutput()
-
         # Unify QUIET and VERBOSE modes...
         if (config.ARGS.quiet):
             if (config.ARGS.verbose > 0):
@@ -327,12 +360,22 @@ def main():
             else:
                 config.ARGS.verbose = -1  # ...store quiet as a verbose setting
 
+        # Test all the given paths before any output changes are made...
+        testInput()
+
+        if (config.ARGS.edbfile != None or config.ARGS.mode == "a"):
+            testESEDB()
+
+        testOutput()
 
         # Correct MD5 mode...
         if (config.ARGS.md5force) and (config.ARGS.md5never):
             config.ARGS.md5force = False
 
-        if (config.ARGS.edbfile != None or config.ARGS.mode == "a"):
+        # The ESEDB is opened, read, and closed once here.  The processors only search
+        #   the loaded records (indexed by ThumbnailCacheId).  Only the parallel job
+        #   processes (-j) load it again, once each (see processor.initWorker).
+        if (config.ARGS.edbfile != None):
             getESEDB()
 
         utils.prepareSymLink()
@@ -356,3 +399,5 @@ def main():
     except verror.VinettoError as ve:
         ve.printError()
         sys.exit(ve.iExitCode)
+    finally:
+        utils.closeSymlinkLog()
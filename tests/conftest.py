@@ -0,0 +1,9 @@
+# -*- coding: UTF-8 -*-
+"""
+Vinetto tests: run against the source tree (see setup.py package_dir)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
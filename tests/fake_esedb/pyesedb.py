@@ -0,0 +1,84 @@
+# -*- coding: UTF-8 -*-
+"""
+Vinetto tests: a stand-in for the pyesedb library
+
+The "EDB file" is a JSON list of records, each a dict of column name to value:
+  str  -> text column value
+  int  -> integer column value (given as 8 little endian bytes for binary reads, i.e., dates)
+  dict -> binary column value as {"hex": "..."}
+"""
+
+import json
+from struct import pack
+
+
+def get_version():
+    return "test"
+
+
+class column():
+    def __init__(self, strName):
+        self.strName = strName
+
+    def get_name(self):
+        return self.strName
+
+
+class record():
+    def __init__(self, listColumns, dictRecord):
+        self.listValues = [dictRecord.get(strName) for strName in listColumns]
+
+    def get_value_data(self, iCol):
+        value = self.listValues[iCol]
+        if (isinstance(value, dict)):
+            return bytes.fromhex(value["hex"])
+        if (isinstance(value, int)):
+            return pack("<Q", value)
+        if (isinstance(value, str)):
+            return value.encode("utf-16-le")
+        return None
+
+    def get_value_data_as_string(self, iCol):
+        return self.listValues[iCol]
+
+    def get_value_data_as_integer(self, iCol):
+        return self.listValues[iCol]
+
+    def get_value_data_as_floating_point(self, iCol):
+        return self.listValues[iCol]
+
+
+class table():
+    def __init__(self, listRecords):
+        self.listColumns = []
+        for dictRecord in listRecords:
+            for strName in dictRecord:
+                if (strName not in self.listColumns):
+                    self.listColumns.append(strName)
+        self.listRecords = [record(self.listColumns, dictRecord) for dictRecord in listRecords]
+
+    def get_number_of_columns(self):
+        return len(self.listColumns)
+
+    def get_column(self, iCol):
+        return column(self.listColumns[iCol])
+
+    def get_number_of_records(self):
+        return len(self.listRecords)
+
+    def get_record(self, iRec):
+        return self.listRecords[iRec]
+
+
+class file():
+    def open(self, strPath):
+        with open(strPath) as fileEDB:
+            self.listRecords = json.load(fileEDB)
+
+    def get_table_by_name(self, strName):
+        if (strName != "SystemIndex_PropertyStore"):
+            return None
+        return table(self.listRecords)
+
+    def close(self):
+        pass
@@ -0,0 +1,177 @@
+# -*- coding: UTF-8 -*-
+"""
+Vinetto tests: the ESEDB value decoders and formatters give the values the per type
+branches in ESEDB.processRecord() and ESEDB.getStr() gave
+"""
+
+from binascii import hexlify
+from struct import pack, unpack
+from time import gmtime, strftime
+from types import SimpleNamespace
+
+import pytest
+
+import vinetto.config as config
+import vinetto.esedb as esedb
+
+
+# The per type branches, as they were...
+def decodeBaseline(cType, recordESEDB, iCol):
+    if   (cType == 'x'):
+        rawESEDB = recordESEDB.get_value_data(iCol)
+    elif (cType == 's'):
+        rawESEDB = recordESEDB.get_value_data_as_string(iCol)
+    elif (cType == 'i'):
+        rawESEDB = recordESEDB.get_value_data_as_integer(iCol)
+    elif (cType == 'b'):
+        rawESEDB = recordESEDB.get_value_data_as_integer(iCol)
+        if (rawESEDB == None or rawESEDB == 0):
+            rawESEDB = False
+        elif (rawESEDB == 1 or rawESEDB == -1):
+            rawESEDB = True
+        else:
+            if (rawESEDB < -2147483648):
+                rawESEDB = rawESEDB & 0xffffffffffffffff
+            if (rawESEDB < -32768):
+                rawESEDB = rawESEDB & 0xffffffff
+            if (rawESEDB < -128):
+                rawESEDB = rawESEDB & 0xffff
+            if (rawESEDB < 0):
+                rawESEDB = rawESEDB & 0xff
+    elif (cType == 'f'):
+        rawESEDB = recordESEDB.get_value_data_as_floating_point(iCol)
+    elif (cType == 'd'):
+        rawESEDB = recordESEDB.get_value_data(iCol)
+        if (rawESEDB == None):
+            rawESEDB = 0
+        else:
+            rawESEDB = unpack("<Q", rawESEDB)[0]
+    return rawESEDB
+
+
+def formatBaseline(cType, dataESEDB):
+    if   (cType == 'x'):
+        strESEDB = str(hexlify(dataESEDB))[2:-1]
+    elif (cType == 's'):
+        strESEDB = dataESEDB
+    elif (cType == 'i'):
+        strESEDB = format(dataESEDB, "d")
+    elif (cType == 'b'):
+        if (isinstance(dataESEDB, bool)):
+            strESEDB = format(dataESEDB, "")
+        else:
+            strFmt = "08b"
+            if (dataESEDB > 255):
+                strFmt = "016b"
+            if (dataESEDB > 65535):
+                strFmt = "032b"
+            if (dataESEDB > 4294967295):
+                strFmt = "064b"
+            strESEDB = format(dataESEDB, strFmt)
+    elif (cType == 'f'):
+        strESEDB = format(dataESEDB, "G")
+    elif (cType == 'd'):
+        iTime = ((dataESEDB // 10000000) - 11644473600) if (dataESEDB != 0) else 0
+        strESEDB = strftime("%Y-%m-%dT%H:%M:%S Z", gmtime(iTime))
+    return strESEDB
+
+
+class Record():
+    # A record with one column value (column 0)...
+    def __init__(self, value):
+        self.value = value
+
+    def get_value_data(self, iCol):
+        return self.value
+
+    def get_value_data_as_string(self, iCol):
+        return self.value
+
+    def get_value_data_as_integer(self, iCol):
+        return self.value
+
+    def get_value_data_as_floating_point(self, iCol):
+        return self.value
+
+
+FLAGS = [None, 0, 1, -1, 2, 127, 128, 255, 256, 65535, 65536, 2**31, 2**32 - 1, 2**32, 2**40, 2**63,
+         -2, -127, -128, -129, -255, -256, -32767, -32768, -32769, -65536, -2**31 + 1, -2**31, -2**31 - 1, -2**40, -2**63]
+FLAGS += [iBit * iSign for iShift in range(65) for iBit in (1 << iShift, (1 << iShift) - 1, (1 << iShift) + 1) for iSign in (1, -1)
+          if (-2**63 <= iBit * iSign < 2**64)]
+
+
+@pytest.mark.parametrize("iFlags", FLAGS)
+def testBooleanFlags(iFlags):
+    dataESEDB = esedb.decodeBoolean(Record(iFlags), 0)
+    dataBaseline = decodeBaseline('b', Record(iFlags), 0)
+    assert (type(dataESEDB), dataESEDB) == (type(dataBaseline), dataBaseline)
+    assert esedb.formatBoolean(dataESEDB) == formatBaseline('b', dataBaseline)
+
+
+def testFlagFormats():
+    # Flags of 1 to 64 bits are displayed 8, 16, 32, or 64 wide...
+    for iBits in range(1, 65):
+        iFlags = (1 << (iBits - 1)) | 2
+        assert len(esedb.formatBoolean(iFlags)) == len(formatBaseline('b', iFlags))
+
+
+@pytest.mark.parametrize("iFileTime, strDate", [
+    (None, "1970-01-01T00:00:00 Z"),
+    (0, "1970-01-01T00:00:00 Z"),
+    (132000000000000000, "2019-04-17T18:40:00 Z"),
+    (116444736000000000, "1970-01-01T00:00:00 Z"),
+    (133500000000000000, "2024-01-17T21:20:00 Z"),
+])
+def testDates(iFileTime, strDate):
+    bstrData = (None if (iFileTime == None) else pack("<Q", iFileTime))
+    dataESEDB = esedb.decodeDate(Record(bstrData), 0)
+    assert dataESEDB == decodeBaseline('d', Record(bstrData), 0)
+    assert esedb.formatDate(dataESEDB) == formatBaseline('d', dataESEDB) == strDate
+
+
+@pytest.mark.parametrize("cType, value", [
+    ('x', b"\xab\xcd\xef\x01\x23\x45\x67\x89"),
+    ('x', b"\x00"),
+    ('x', b""),
+    ('s', "image/jpeg"),
+    ('i', 0),
+    ('i', -12345),
+    ('i', 2**40),
+    ('f', 96.0),
+    ('f', 0.1),
+    ('f', 1e20),
+])
+def testValues(cType, value):
+    dataESEDB = esedb.ESEDB_DECODERS[cType](Record(value), 0)
+    assert dataESEDB == decodeBaseline(cType, Record(value), 0)
+    assert esedb.ESEDB_FORMATTERS[cType](dataESEDB) == formatBaseline(cType, dataESEDB)
+
+
+def testTablesCoverTypes():
+    setTypes = set(tupleName[1] for tupleName in esedb.ESEDB().iColNames.values())
+    assert setTypes <= set(esedb.ESEDB_DECODERS)
+    assert set(esedb.ESEDB_DECODERS) == set(esedb.ESEDB_FORMATTERS)
+
+
+def testRecordStrs(monkeypatch):
+    # The ESEDB Explorer's formatted records are the found record's getStr() values...
+    monkeypatch.setattr(config, "ARGS", SimpleNamespace(verbose=1), raising=False)
+    edb = esedb.ESEDB()
+    for (iCol, strKey) in enumerate(("TCID", "MIME", "DATEM", "IHSZ", "IHRES", "SIZE")):
+        edb.iCol[strKey] = iCol
+    edb.listRecords = [
+        dict.fromkeys(edb.iColNames, None),
+        dict.fromkeys(edb.iColNames, None),
+    ]
+    edb.listRecords[0].update(TCID=b"\xab\xcd\xef\x01\x23\x45\x67\x89", MIME="image/jpeg", DATEM=132000000000000000,
+                              IHSZ=96, IHRES=96.0, SIZE=b"\x00\x10")
+    edb.listRecords[1].update(TCID=b"\x01", MIME="image/png", DATEM=0, IHSZ=-1, IHRES=0.5, SIZE=b"")
+
+    listRecordStrs = edb.getRecordStrs()
+    for (dictRecord, dictRecordStrs) in zip(edb.listRecords, listRecordStrs):
+        edb.dictRecord = dictRecord
+        for strKey in edb.iColNames:
+            assert dictRecordStrs.get(strKey) == edb.getStr(strKey)
+    assert listRecordStrs[0]["TCID"] == "abcdef0123456789"
+    assert listRecordStrs[0]["DATEM"] == "2019-04-17T18:40:00 Z"
+    assert listRecordStrs[1]["SIZE"] == ""
@@ -0,0 +1,124 @@
+# -*- coding: UTF-8 -*-
+"""
+Vinetto tests: parallel jobs (-j) report as a serial run
+"""
+
+import os
+import re
+import json
+import shutil
+from concurrent.futures import Future
+
+import pytest
+
+import thumbfiles
+
+pytest.importorskip("numpy")
+
+
+JPEG = b"\xff\xd8\xff\xe0" + b"J" * 40 + b"\xff\xd9"
+PNG = b"\x89PNG\r\n\x1a\n" + b"P" * 20
+
+
+def makeTree(strTop):
+    # A directory tree of good (and not Thumbnail) files...
+    thumbfiles.writeFile(os.path.join(strTop, "Thumbs.db"), thumbfiles.getOLE())
+    thumbfiles.writeFile(os.path.join(strTop, "thumbcache_96.db"),
+                         thumbfiles.getCMMM([("abcdef0123456789", JPEG), ("0000000000001234", PNG)]))
+    thumbfiles.writeFile(os.path.join(strTop, "thumbcache_256.db"),
+                         thumbfiles.getCMMM([("00000000000000ff", JPEG)]))
+    thumbfiles.writeFile(os.path.join(strTop, "notes.db"), b"NOT A THUMB" * 10)
+    thumbfiles.writeFile(os.path.join(strTop, "sub", "Thumbs.db"), thumbfiles.getOLE())
+    thumbfiles.writeFile(os.path.join(strTop, "sub", "thumbcache_32.db"),
+                         thumbfiles.getCMMM([("0123456789abcdef", PNG)]))
+    return strTop
+
+
+# Each job process reports its own PIL import (see the -j help)...
+PIL_INFO = " Info: Imported PIL for possible Type 1 exports\n"
+
+
+def runJobs(listArgs, strOutDir, bFakeESEDB=False):
+    # Run with 1 job and then 2 jobs, returning each run's results and output files...
+    #   The HTML reports' dates and the PIL import messages are removed
+    listRuns = []
+    for strJobs in ("1", "2"):
+        shutil.rmtree(strOutDir, ignore_errors=True)
+        (iExit, strOut, strErr) = thumbfiles.runVinetto(["-j", strJobs, "-o", strOutDir] + listArgs, bFakeESEDB)
+        listFiles = [(tupleEntry[0], re.sub(rb"Report Date: [^<]*", b"", tupleEntry[1])) if (len(tupleEntry) == 2) else tupleEntry
+                     for tupleEntry in thumbfiles.listTree(strOutDir)]
+        listRuns.append(((iExit, strOut, strErr.replace(PIL_INFO, "")), listFiles))
+    return listRuns
+
+
+@pytest.mark.parametrize("strMode", ["d", "r"])
+def testParallelMatchesSerial(tmp_path, strMode):
+    strTop = makeTree(str(tmp_path / "in"))
+    ((tupleSerial, listSerial), (tupleParallel, listParallel)) = runJobs(
+        ["-m", strMode, "-vv", "-H", strTop], str(tmp_path / "out"))
+
+    assert tupleSerial[0] == 0
+    assert tupleParallel == tupleSerial
+    assert listParallel == listSerial
+    assert tupleSerial[1].count(" File: ") == (4 if (strMode == "d") else 6)
+
+
+@pytest.mark.parametrize("strMode", ["d", "r"])
+def testParallelErrorStopsRun(tmp_path, strMode):
+    # A Thumbs.db cut short in its allocation table is an error that stops the run...
+    strTop = makeTree(str(tmp_path / "in"))
+    thumbfiles.writeFile(os.path.join(strTop, "cut.db"), thumbfiles.getOLE()[:800])
+    for iFile in range(8):
+        thumbfiles.writeFile(os.path.join(strTop, "thumbcache_%d.db" % iFile),
+                             thumbfiles.getCMMM([("00000000000000%02x" % iFile, JPEG)]))
+    ((tupleSerial, listSerial), (tupleParallel, listParallel)) = runJobs(
+        ["-m", strMode, strTop], str(tmp_path / "out"))
+
+    assert tupleSerial[0] != 0
+    assert "Allocation table sector 0 is beyond the end of file" in tupleSerial[2]
+    assert tupleParallel == tupleSerial
+
+
+def testParallelESEDBSymlinks(tmp_path):
+    # The workers load the ESEDB file themselves, so their files are linked by its records...
+    strTop = makeTree(str(tmp_path / "in"))
+    strEDBFile = str(tmp_path / "Windows.edb")
+    with open(strEDBFile, "w") as fileEDB:
+        json.dump([
+            {"System_ThumbnailCacheId": {"hex": "abcdef0123456789"}, "System_MIMEType": "image/jpeg",
+             "System_ItemUrl": "file:C:/Users/alice/Pictures/beach.jpg", "System_DateModified": 132000000000000000},
+            {"System_ThumbnailCacheId": {"hex": "0123456789abcdef"}, "System_MIMEType": "image/png",
+             "System_ItemUrl": "file:C:/Users/alice/Pictures/logo.png?x=1", "System_DateModified": 132000000000000000},
+        ], fileEDB)
+    ((tupleSerial, listSerial), (tupleParallel, listParallel)) = runJobs(
+        ["-m", "r", "-s", "-e", strEDBFile, strTop], str(tmp_path / "out"), bFakeESEDB=True)
+
+    assert tupleSerial[0] == 0
+    assert tupleParallel == tupleSerial
+    assert listParallel == listSerial
+    assert ("beach.jpg", "->", ".thumbs/abcdef0123456789.jpg") in listParallel
+    assert ("logo.png", "->", ".thumbs/0123456789abcdef.png") in listParallel
+
+
+class FinishedExecutor():
+    # An executor whose submitted calls are queued as finished futures (first call errors)...
+    def __init__(self):
+        self.listFutures = []
+
+    def submit(self, funcCall, *args):
+        futureCall = Future()
+        if (not self.listFutures):
+            futureCall.set_result(("first\n", "", "", ValueError("first file")))
+        self.listFutures.append(futureCall)
+        return futureCall
+
+
+def testReportCancelsLaterFiles(capsys):
+    import vinetto.processor as processor
+
+    executor = FinishedExecutor()
+    with pytest.raises(ValueError):
+        processor.Processor().reportThumbFiles(executor, ["a.db", "b.db", "c.db"], None)
+
+    assert capsys.readouterr().out == "first\n"
+    assert [futureFile.cancelled() for futureFile in executor.listFutures] == [False, True, True]
@@ -0,0 +1,52 @@
+# -*- coding: UTF-8 -*-
+"""
+Vinetto tests: OLE (Thumbs.db) files
+"""
+
+import sys
+
+import pytest
+
+import thumbfiles
+
+pytest.importorskip("numpy")
+
+import vinetto.config as config
+import vinetto.error as verror
+import vinetto.processor as processor
+import vinetto.thumbOLE as thumbOLE
+import vinetto.vinetto as vinetto
+
+
+def setArgs(monkeypatch, listArgs):
+    monkeypatch.setattr(sys, "argv", ["vinetto"] + listArgs)
+    monkeypatch.setattr(config, "ARGS", vinetto.getArgs(), raising=False)
+
+
+def testProcess(tmp_path, monkeypatch, capsys):
+    strFile = thumbfiles.writeFile(str(tmp_path / "Thumbs.db"), thumbfiles.getOLE())
+    setArgs(monkeypatch, [strFile])
+    processor.Processor().processThumbFile(strFile)
+
+    strOut = capsys.readouterr().out
+    assert "3:  2019-04-17T18:43:20 Z  three.jpg" in strOut
+    assert strOut.count("Stream Entry") == 4
+
+
+@pytest.mark.parametrize("iSize", [520, 800, 1023])
+def testTruncatedAllocationTable(tmp_path, monkeypatch, iSize):
+    # A Thumbs.db cut inside its SAT sector (sector 0, at 512 to 1024) is an entry error...
+    strFile = thumbfiles.writeFile(str(tmp_path / "Thumbs.db"), thumbfiles.getOLE()[:iSize])
+    setArgs(monkeypatch, ["-q", strFile])
+    with pytest.raises(verror.EntryError) as infoError:
+        processor.Processor().processThumbFile(strFile)
+    assert "Allocation table sector 0 is beyond the end of file" in str(infoError.value)
+
+
+def testLoadTable():
+    bstrFile = thumbfiles.getOLE()
+    arrayTable = thumbOLE.loadTable(memoryview(bstrFile), [0], "<")
+    assert arrayTable.itemsize == 4
+    assert list(arrayTable[:4]) == [0xFFFFFFFD, 2, thumbfiles.OLE_LAST, thumbfiles.OLE_LAST]
+    with pytest.raises(verror.EntryError):
+        thumbOLE.loadTable(memoryview(bstrFile[:1000]), [0], "<")
@@ -0,0 +1,60 @@
+# -*- coding: UTF-8 -*-
+"""
+Vinetto tests: the recursive mode selects the files os.walk() and fnmatch.filter() did
+"""
+
+import os
+import fnmatch
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import vinetto.processor as processor
+
+
+PATTERNS = ["Thumbs.db", "thumbcache_*.db", "*humbs_*.db", "[Ii]con*_?.db", "*.DB"]
+NAMES = ["Thumbs.db", "thumbs.db", "THUMBS.DB", "thumbcache_96.db", "Thumbcache_96.db", "thumbcache_idx.DB",
+         "ehthumbs_vista.db", "iconcache_1.db", "Iconcache_x.db", "iconcache_10.db", "notes.txt", "x.DB"]
+
+
+def makeTree(strTop, strOutside):
+    # Mixed case names in nested directories, with links to directories inside and outside
+    #   of the tree and a link to a file...
+    for strDir in (strTop, os.path.join(strTop, "a"), os.path.join(strTop, "a", "B"), os.path.join(strTop, "C"), strOutside):
+        os.makedirs(strDir, exist_ok=True)
+        for strName in NAMES:
+            open(os.path.join(strDir, strName), "w").close()
+    os.symlink(strOutside, os.path.join(strTop, "outside"))
+    os.symlink(os.path.join(strTop, "a"), os.path.join(strTop, "C", "loop"))
+    os.symlink(os.path.join(strTop, "a", "Thumbs.db"), os.path.join(strTop, "C", "linkthumbs_1.db"))
+
+
+def getWalkFiles(strTop):
+    # The files selected before the directory walk was replaced...
+    setFiles = set()
+    for (strDir, listDirs, listFiles) in os.walk(strTop):
+        for strPattern in PATTERNS:
+            for strName in fnmatch.filter(listFiles, strPattern):
+                setFiles.add(os.path.join(strDir, strName))
+    return setFiles
+
+
+def testSelectMatchesWalk(tmp_path, monkeypatch):
+    strTop = str(tmp_path / "top")
+    makeTree(strTop, str(tmp_path / "outside"))
+    (setNames, tupleSimple, reOther) = processor.getIncludes(PATTERNS)
+    assert setNames and tupleSimple and reOther  # ...all three shapes are tested
+    monkeypatch.setattr(processor, "INCLUDES_NAMES", setNames)
+    monkeypatch.setattr(processor, "INCLUDES_SIMPLE", tupleSimple)
+    monkeypatch.setattr(processor, "INCLUDES_RE", reOther)
+
+    setFiles = set()
+    for (strDir, listFiles) in processor.Processor().walkDirectories(strTop):
+        setFiles.update(os.path.join(strDir, strName) for strName in listFiles if processor.isIncluded(strName))
+
+    setWalkFiles = getWalkFiles(strTop)
+    assert setFiles == setWalkFiles
+    # The linked directories are not walked, the linked file is selected...
+    assert not any((os.sep + "outside" + os.sep) in strFile or (os.sep + "loop" + os.sep) in strFile for strFile in setFiles)
+    assert os.path.join(strTop, "C", "linkthumbs_1.db") in setFiles
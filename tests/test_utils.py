@@ -0,0 +1,52 @@
+# -*- coding: UTF-8 -*-
+"""
+Vinetto tests: utility functions
+"""
+
+import os
+
+import pytest
+
+import vinetto.error as verror
+import vinetto.utils as utils
+
+
+def testSetSymlinkReplaces(tmp_path, monkeypatch):
+    # An existing link is replaced in one rename, over a stale temp link of an earlier run...
+    strLink = str(tmp_path / "photo.jpg")
+    os.symlink(".thumbs/old.jpg", strLink)
+    strLinkTemp = "%s.tmp.%d" % (strLink, os.getpid())
+    os.symlink(".thumbs/stale.jpg", strLinkTemp)
+
+    removeFile = os.remove
+    def removeNotLink(strPath):
+        assert strPath != strLink  # ...the link itself is never missing
+        removeFile(strPath)
+    monkeypatch.setattr(os, "remove", removeNotLink)
+    monkeypatch.setattr(os, "unlink", removeNotLink)
+
+    utils.setSymlink(".thumbs/new.jpg", strLink)
+    assert os.readlink(strLink) == ".thumbs/new.jpg"
+    assert not os.path.lexists(strLinkTemp)
+    assert sorted(os.listdir(str(tmp_path))) == ["photo.jpg"]
+
+
+def testSetSymlinkNew(tmp_path):
+    strLink = str(tmp_path / "photo.jpg")
+    utils.setSymlink(".thumbs/new.jpg", strLink)
+    assert os.readlink(strLink) == ".thumbs/new.jpg"
+
+
+def testSetSymlinkErrors(tmp_path):
+    # No directory for the link...
+    with pytest.raises(verror.LinkError):
+        utils.setSymlink(".thumbs/new.jpg", str(tmp_path / "missing" / "photo.jpg"))
+
+    # A directory is in the link's place, so it cannot be replaced...
+    strDir = str(tmp_path / "photo.jpg")
+    os.mkdir(strDir)
+    open(os.path.join(strDir, "file"), "w").close()
+    with pytest.raises(verror.LinkError):
+        utils.setSymlink(".thumbs/new.jpg", strDir)
+    assert os.path.isdir(strDir) and not os.path.islink(strDir)
+    assert sorted(os.listdir(str(tmp_path))) == ["photo.jpg"]  # ...no temp link is left
@@ -0,0 +1,145 @@
+# -*- coding: UTF-8 -*-
+"""
+Vinetto tests: small Thumbnail files built on the fly and a command line runner
+"""
+
+import os
+import sys
+import subprocess
+from struct import pack
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+FAKE_ESEDB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_esedb")
+
+OLE_LAST = 0xFFFFFFFE
+OLE_FREE = 0xFFFFFFFF
+
+
+def getOLEDirEntry(strName, iType, iFirst, iSize):
+    bstrName = strName.encode("utf-16-le") + b"\0\0"
+    bstrEntry = bstrName.ljust(64, b"\0") + pack("<HB?LLL", len(bstrName), iType, True, OLE_FREE, OLE_FREE, OLE_FREE)
+    bstrEntry += bytes(20) + pack("<QQLL", 0, 0, iFirst, iSize)
+    return bstrEntry.ljust(128, b"\0")
+
+
+def getOLEType2(iLen, iFill):
+    # A Type 2 (full JPEG) stream...
+    bstrJPEG = b"\xff\xd8\xff\xe0" + bytes([iFill]) * iLen + b"\xff\xd9"
+    return pack("<LLH", 12, 1, len(bstrJPEG)) + b"\0\0" + bstrJPEG
+
+
+def getOLECatalog(listEntries):
+    bstrCatalog = pack("<HHLLL", 16, 5, len(listEntries), 96, 96)
+    for (iID, iTimestamp, strName) in listEntries:
+        bstrName = strName.encode("utf-16-le")
+        bstrCatalog += pack("<LLQ", 16 + len(bstrName) + 4, iID, iTimestamp) + bstrName + b"\0" * 4
+    return bstrCatalog
+
+
+def getOLE():
+    # A Thumbs.db with a Catalog, two Mini stream images, and one regular stream image
+    #   whose sectors are not in order...
+    iTimestamp = 132000000000000000
+    bstrCatalog = getOLECatalog([(1, iTimestamp, "one.jpg"), (2, iTimestamp + 10**9, "two.jpg"),
+                                 (3, iTimestamp + 2 * 10**9, "three.jpg")])
+    listMini = [bstrCatalog, getOLEType2(150, 0x41), getOLEType2(60, 0x43)]
+    bstrBig = getOLEType2(5000, 0x42)
+
+    # Mini stream and MiniSAT...
+    bstrMini = b""
+    listMiniSAT = []
+    listMiniFirst = []
+    for bstrData in listMini:
+        iStart = len(bstrMini) // 64
+        iCount = (len(bstrData) + 63) // 64
+        bstrMini += bstrData.ljust(iCount * 64, b"\0")
+        listMiniSAT += list(range(iStart + 1, iStart + iCount)) + [OLE_LAST]
+        listMiniFirst.append(iStart)
+    iMiniSecs = (len(bstrMini) + 511) // 512
+    bstrMini = bstrMini.ljust(iMiniSecs * 512, b"\0")
+
+    # Sectors: 0 SAT, 1-2 Directory, 3 MiniSAT, then the Mini stream and the regular stream...
+    listMiniSecs = list(range(4, 4 + iMiniSecs))
+    iBigSecs = (len(bstrBig) + 511) // 512
+    listBigSecs = list(range(4 + iMiniSecs, 4 + iMiniSecs + iBigSecs))[::-1]
+    dictSAT = {0: 0xFFFFFFFD, 1: 2, 2: OLE_LAST, 3: OLE_LAST}
+    for listChain in (listMiniSecs, listBigSecs):
+        for (iSec, iNext) in zip(listChain, listChain[1:]):
+            dictSAT[iSec] = iNext
+        dictSAT[listChain[-1]] = OLE_LAST
+
+    bstrDir = b"".join((
+        getOLEDirEntry("Root Entry", 5, listMiniSecs[0], len(bstrMini)),
+        getOLEDirEntry("Catalog", 2, listMiniFirst[0], len(listMini[0])),
+        getOLEDirEntry("1", 2, listMiniFirst[1], len(listMini[1])),
+        getOLEDirEntry("2", 2, listBigSecs[0], len(bstrBig)),
+        getOLEDirEntry("3", 2, listMiniFirst[2], len(listMini[2])) ))
+
+    dictSectors = {
+        0: b"".join(pack("<L", dictSAT.get(i, OLE_FREE)) for i in range(128)),
+        1: bstrDir[:512],
+        2: bstrDir[512:].ljust(512, b"\0"),
+        3: b"".join(pack("<L", i) for i in listMiniSAT).ljust(512, b"\xff"),
+    }
+    for (i, iSec) in enumerate(listMiniSecs):
+        dictSectors[iSec] = bstrMini[i * 512:(i + 1) * 512]
+    bstrBig = bstrBig.ljust(iBigSecs * 512, b"\0")
+    for (i, iSec) in enumerate(listBigSecs):
+        dictSectors[iSec] = bstrBig[i * 512:(i + 1) * 512]
+
+    bstrHead = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + bytes(16) + pack("<HH", 0x3E, 3) + b"\xfe\xff"
+    bstrHead += pack("<HHHLL", 9, 6, 0, 0, 0)
+    bstrHead += pack("<LLLLLLLLL", 1, 1, 0, 4096, 3, 1, OLE_LAST, 0, 0)
+    bstrHead = bstrHead.ljust(512, b"\xff")
+    return bstrHead + b"".join(dictSectors[i] for i in range(max(dictSectors) + 1))
+
+
+def getCMMMEntry(strID, bstrData):
+    # A Windows 7 cache entry...
+    bstrID = strID.encode("utf-16-le")
+    bstrBody = pack("<QLLL", 0x1234, len(bstrID), 4, len(bstrData)) + pack("<LQQ", 0, 0, 0)
+    bstrBody += bstrID + b"\0" * 4 + bstrData
+    return b"CMMM" + pack("<L", 8 + len(bstrBody)) + bstrBody
+
+
+def getCMMM(listEntries):
+    # A Windows 7 thumbcache_*.db with the given (ID, data) entries...
+    bstrEntries = b"".join(getCMMMEntry(strID, bstrData) for (strID, bstrData) in listEntries)
+    iHeadLen = 24
+    return (b"CMMM" + pack("<LLLLL", 0x15, 1, iHeadLen, iHeadLen + len(bstrEntries), len(listEntries)) +
+            bstrEntries + b"\0" * 60)
+
+
+def writeFile(strPath, bstrData):
+    os.makedirs(os.path.dirname(strPath), exist_ok=True)
+    with open(strPath, "wb") as fileOut:
+        fileOut.write(bstrData)
+    return strPath
+
+
+def runVinetto(listArgs, bFakeESEDB=False):
+    # Run the vinetto command line, returning its exit code, stdout, and stderr...
+    listPaths = [SRC_DIR]
+    if (bFakeESEDB):
+        listPaths.insert(0, FAKE_ESEDB_DIR)
+    dictEnv = dict(os.environ, PYTHONPATH=os.pathsep.join(listPaths))
+    procRun = subprocess.run(
+        [sys.executable, "-c", "import sys; sys.argv[0] = 'vinetto'; from vinetto.vinetto import main; main()"] + listArgs,
+        env=dictEnv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    return (procRun.returncode, procRun.stdout, procRun.stderr)
+
+
+def listTree(strDir):
+    # List a directory tree's files (with their contents) and links (with their targets)...
+    listEntries = []
+    for (strPath, listDirs, listFiles) in os.walk(strDir):
+        listDirs.sort()
+        for strName in sorted(listFiles + [strSub for strSub in listDirs if os.path.islink(os.path.join(strPath, strSub))]):
+            strFile = os.path.join(strPath, strName)
+            strRel = os.path.relpath(strFile, strDir)
+            if (os.path.islink(strFile)):
+                listEntries.append((strRel, "->", os.readlink(strFile)))
+            else:
+                with open(strFile, "rb") as fileIn:
+                    listEntries.append((strRel, fileIn.read()))
+    return listEntries